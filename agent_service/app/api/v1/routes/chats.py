@@ -18,12 +18,11 @@ Errors/Exceptions:
 - Internal runtime failures are converted into terminal `chat.error` events.
 """
 
-import json
-import traceback
-
+import orjson
 from fastapi import APIRouter
 from fastapi.responses import StreamingResponse
 
+from ....core.concurrency import iterate_in_workflow_executor
 from ....core.logging import get_logger
 from ....schemas.requests import ChatStreamRequest
 from ....services.run_agent_service import stream_chat_workflow
@@ -32,13 +31,13 @@ logger = get_logger("headstart.main")
 router = APIRouter(tags=["chats"])
 
 
-def _format_sse(event: str, data: dict, event_id: int) -> str:
-    payload = json.dumps(data, ensure_ascii=False)
-    lines = [f"id: {event_id}", f"event: {event}"]
-    for line in payload.splitlines() or [""]:
-        lines.append(f"data: {line}")
-    lines.append("")
-    return "\n".join(lines) + "\n"
+def _format_sse(event: str, data: dict, event_id: int) -> bytes:
+    # orjson never emits raw newlines, so the payload always fits one `data:` line.
+    return b"id: %d\nevent: %s\ndata: %s\n\n" % (
+        event_id,
+        event.encode("utf-8"),
+        orjson.dumps(data),
+    )
 
 
 def handle_chat_stream_request(req: ChatStreamRequest, route_path: str):
@@ -55,8 +54,8 @@ def handle_chat_stream_request(req: ChatStreamRequest, route_path: str):
                     event_data = {"value": event_data}
                 yield _format_sse(event_name, event_data, event_id)
         except Exception as e:
-            logger.error("Chat stream route error: %s", repr(e))
-            logger.debug("Traceback:\n%s", traceback.format_exc())
+            logger.error("Chat stream route error: %r", e)
+            logger.debug("Traceback:", exc_info=True)
             yield _format_sse(
                 "chat.error",
                 {
@@ -69,7 +68,7 @@ def handle_chat_stream_request(req: ChatStreamRequest, route_path: str):
             )
 
     return StreamingResponse(
-        event_stream(),
+        iterate_in_workflow_executor(event_stream()),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache, no-transform",
@@ -80,5 +79,5 @@ def handle_chat_stream_request(req: ChatStreamRequest, route_path: str):
 
 
 @router.post("/chats/stream")
-def create_chat_stream(req: ChatStreamRequest):
+async def create_chat_stream(req: ChatStreamRequest):
     return handle_chat_stream_request(req, route_path="/api/v1/chats/stream")
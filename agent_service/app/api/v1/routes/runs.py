@@ -19,37 +19,41 @@ Errors/Exceptions:
 - Raises HTTPException(500) when workflow/orchestrator execution fails.
 """
 
-import json
-import traceback
-
+import orjson
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import StreamingResponse
 
+from ....core.concurrency import iterate_in_workflow_executor, run_in_workflow_executor
 from ....core.logging import get_logger
-from ....schemas.requests import RunAgentRequest
-from ....services.run_agent_service import run_agent_workflow, stream_run_agent_workflow
+from ....schemas.requests import RunAgentBatchRequest, RunAgentRequest
+from ....schemas.responses import RunAgentBatchResponse
+from ....services.run_agent_service import (
+    run_agent_batch_workflow,
+    run_agent_workflow,
+    stream_run_agent_workflow,
+)
 
 logger = get_logger("headstart.main")
 router = APIRouter(tags=["runs"])
 
 
-def handle_run_agent_request(req: RunAgentRequest, route_path: str):
+async def handle_run_agent_request(req: RunAgentRequest, route_path: str):
     """Shared run-agent handler body used by v1 and legacy routes."""
     try:
-        return run_agent_workflow(req, route_path=route_path)
+        return await run_in_workflow_executor(run_agent_workflow, req, route_path=route_path)
     except Exception as e:
-        logger.error("Agent error: %s", repr(e))
-        logger.debug("Traceback:\n%s", traceback.format_exc())
+        logger.error("Agent error: %r", e)
+        logger.debug("Traceback:", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
-def _format_sse(event: str, data: dict, event_id: int) -> str:
-    payload = json.dumps(data, ensure_ascii=False)
-    lines = [f"id: {event_id}", f"event: {event}"]
-    for line in payload.splitlines() or [""]:
-        lines.append(f"data: {line}")
-    lines.append("")
-    return "\n".join(lines) + "\n"
+def _format_sse(event: str, data: dict, event_id: int) -> bytes:
+    # orjson never emits raw newlines, so the payload always fits one `data:` line.
+    return b"id: %d\nevent: %s\ndata: %s\n\n" % (
+        event_id,
+        event.encode("utf-8"),
+        orjson.dumps(data),
+    )
 
 
 def handle_run_agent_stream_request(req: RunAgentRequest, route_path: str):
@@ -66,8 +70,8 @@ def handle_run_agent_stream_request(req: RunAgentRequest, route_path: str):
                     event_data = {"value": event_data}
                 yield _format_sse(event_name, event_data, event_id)
         except Exception as e:
-            logger.error("Agent stream error: %s", repr(e))
-            logger.debug("Traceback:\n%s", traceback.format_exc())
+            logger.error("Agent stream error: %r", e)
+            logger.debug("Traceback:", exc_info=True)
             yield _format_sse(
                 "run.error",
                 {
@@ -80,7 +84,7 @@ def handle_run_agent_stream_request(req: RunAgentRequest, route_path: str):
             )
 
     return StreamingResponse(
-        event_stream(),
+        iterate_in_workflow_executor(event_stream()),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache, no-transform",
@@ -91,10 +95,20 @@ def handle_run_agent_stream_request(req: RunAgentRequest, route_path: str):
 
 
 @router.post("/runs")
-def create_run(req: RunAgentRequest):
-    return handle_run_agent_request(req, route_path="/api/v1/runs")
+async def create_run(req: RunAgentRequest):
+    return await handle_run_agent_request(req, route_path="/api/v1/runs")
 
 
 @router.post("/runs/stream")
-def create_run_stream(req: RunAgentRequest):
+async def create_run_stream(req: RunAgentRequest):
     return handle_run_agent_stream_request(req, route_path="/api/v1/runs/stream")
+
+
+@router.post("/runs/batch", response_model=RunAgentBatchResponse)
+async def create_run_batch(req: RunAgentBatchRequest):
+    try:
+        return await run_agent_batch_workflow(req, route_path="/api/v1/runs/batch")
+    except Exception as e:
+        logger.error("Agent batch error: %r", e)
+        logger.debug("Traceback:", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
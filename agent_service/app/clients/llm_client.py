@@ -12,7 +12,7 @@ Inputs:
 - Acceptable: Model name string, numeric temperature, and max token values.
 - Unacceptable: Unsupported model identifiers or non-numeric generation parameters.
 Postconditions:
-- Returns a configured ChatNVIDIA client instance for downstream orchestration.
+- Returns a configured ChatNVIDIA client instance for downstream orchestration, shared across calls with identical settings.
 Returns:
 - `ChatNVIDIA` object.
 Errors/Exceptions:
@@ -20,6 +20,7 @@ Errors/Exceptions:
 """
 
 import os
+from functools import lru_cache
 
 from langchain_nvidia_ai_endpoints import ChatNVIDIA
 from langchain_nvidia_ai_endpoints._statics import MODEL_TABLE, Model, register_model
@@ -94,6 +95,7 @@ def _strict_model_runtime_error(model_name: str, reason: str, raw_error: str) ->
     )
 
 
+@lru_cache(maxsize=8)
 def build_nvidia_chat_client(
     model_name: str,
     temperature: float,
@@ -106,6 +108,10 @@ def build_nvidia_chat_client(
     endpoint. LangChain's ChatNVIDIA class names the token limit
     `max_completion_tokens`, even though the NVIDIA dashboard examples call it
     `max_tokens`.
+
+    Clients are memoized per generation config so every request reuses one
+    pooled HTTP session instead of paying a fresh TCP/TLS handshake. Failed
+    constructions are not cached.
     """
     _register_strict_guide_model_if_missing(model_name)
 
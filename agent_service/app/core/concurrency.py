@@ -0,0 +1,60 @@
+"""
+Artifact: agent_service/app/core/concurrency.py
+Purpose: Bounded worker pool that keeps blocking workflow and provider calls off the event loop.
+"""
+
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import AsyncIterator, Callable, Iterator, TypeVar
+
+from .config import settings
+
+T = TypeVar("T")
+
+_EXHAUSTED = object()
+
+
+@lru_cache(maxsize=1)
+def get_workflow_executor() -> ThreadPoolExecutor:
+    """Return the process-wide executor used for blocking workflow calls."""
+    return ThreadPoolExecutor(
+        max_workers=settings.max_concurrency(),
+        thread_name_prefix="headstart-workflow",
+    )
+
+
+def shutdown_workflow_executor() -> None:
+    """Stop the workflow executor if it was started; a later call builds a fresh one."""
+    if get_workflow_executor.cache_info().currsize:
+        get_workflow_executor().shutdown(wait=True, cancel_futures=True)
+        get_workflow_executor.cache_clear()
+
+
+async def run_in_workflow_executor(func: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Run a blocking callable on the workflow executor and await its result.
+
+    The caller's context is copied so context variables such as the request ID
+    remain visible on the worker thread.
+    """
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(
+        get_workflow_executor(),
+        functools.partial(ctx.run, func, *args, **kwargs),
+    )
+
+
+async def iterate_in_workflow_executor(iterator: Iterator[T]) -> AsyncIterator[T]:
+    """Advance a blocking iterator on the workflow executor, yielding each item asynchronously."""
+    loop = asyncio.get_running_loop()
+    executor = get_workflow_executor()
+    ctx = contextvars.copy_context()
+    while True:
+        item = await loop.run_in_executor(executor, ctx.run, next, iterator, _EXHAUSTED)
+        if item is _EXHAUSTED:
+            return
+        yield item
@@ -8,7 +8,7 @@ Revised:
 Preconditions:
 - Environment variables may be present in process env and optional .env file.
 Inputs:
-- Acceptable: String environment variables such as NVIDIA_API_KEY.
+- Acceptable: String environment variables such as NVIDIA_API_KEY and AGENT_MAX_CONCURRENCY.
 - Unacceptable: Non-string values for expected environment variables.
 Postconditions:
 - Dotenv variables are loaded and configuration constants are available to callers.
@@ -30,10 +30,20 @@ class Settings:
     """Application-level configuration values."""
 
     app_title: str = "Headstart Agent Service"
+    default_max_concurrency: int = 40
 
     @staticmethod
     def nvidia_api_key() -> str:
         return os.getenv("NVIDIA_API_KEY", "")
 
+    @classmethod
+    def max_concurrency(cls) -> int:
+        """Upper bound on concurrently executing blocking workflow calls."""
+        try:
+            value = int(os.getenv("AGENT_MAX_CONCURRENCY", str(cls.default_max_concurrency)))
+        except ValueError:
+            return cls.default_max_concurrency
+        return value if value > 0 else cls.default_max_concurrency
+
 
 settings = Settings()
@@ -19,15 +19,42 @@ Errors/Exceptions:
 """
 
 import logging
+import os
+from contextvars import ContextVar
+
+DEFAULT_LOG_LEVEL = "DEBUG"
+
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp each record with the request ID of the HTTP request that produced it."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
 
 
 def configure_logging() -> None:
-    """Apply process-wide logging configuration for the service."""
+    """
+    Apply process-wide logging configuration for the service.
+
+    Safe to call repeatedly: if the root logger already has handlers (for example
+    installed by uvicorn or a test runner), the existing configuration is kept.
+    `LOG_LEVEL` overrides the default level. Records carry the current
+    `request_id_var` value so logs can be correlated per HTTP request.
+    """
+    root = logging.getLogger()
+    if root.handlers:
+        return
+    level = logging.getLevelName(os.getenv("LOG_LEVEL", DEFAULT_LOG_LEVEL).strip().upper())
     logging.basicConfig(
-        level=logging.DEBUG,
-        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+        level=level if isinstance(level, int) else logging.DEBUG,
+        format="%(asctime)s [%(levelname)s] [%(request_id)s] %(name)s: %(message)s",
         datefmt="%H:%M:%S",
     )
+    for handler in root.handlers:
+        handler.addFilter(RequestIdFilter())
 
 
 def get_logger(name: str) -> logging.Logger:
@@ -0,0 +1,60 @@
+"""
+Artifact: agent_service/app/core/middleware.py
+Purpose: Pure-ASGI request logging middleware that tags responses with a request ID.
+"""
+
+import time
+import uuid
+
+from .logging import get_logger, request_id_var
+
+logger = get_logger("headstart.main")
+
+REQUEST_ID_HEADER = b"x-request-id"
+
+
+class RequestLoggingMiddleware:
+    """
+    Log method, path, status, and duration for every HTTP request.
+
+    The generated request ID is bound to `request_id_var` for the lifetime of the
+    request, so every log line emitted while handling it carries the same ID.
+
+    Implemented directly against the ASGI interface (no BaseHTTPMiddleware), so
+    no Request/Response objects are built and streaming bodies pass through untouched.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_request_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (REQUEST_ID_HEADER, request_id.encode("latin-1")),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            logger.info(
+                "%s %s -> %d in %.1fms",
+                scope["method"],
+                scope["path"],
+                status_code,
+                (time.perf_counter() - start) * 1000.0,
+            )
+            request_id_var.reset(token)
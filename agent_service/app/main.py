@@ -18,6 +18,8 @@ Errors/Exceptions:
 - Endpoint handlers map runtime failures to HTTP 500 responses with error detail.
 """
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
 from .api.v1.router import api_v1_router
@@ -27,13 +29,29 @@ from .api.v1.routes.runs import (
     handle_run_agent_stream_request,
 )
 from .api.v1.routes.chats import handle_chat_stream_request
+from .core.concurrency import get_workflow_executor, shutdown_workflow_executor
 from .core.config import settings
 from .core.logging import configure_logging
+from .core.middleware import RequestLoggingMiddleware
 from .schemas.requests import ChatStreamRequest, RunAgentRequest
+from .services.pdf_text_service import shutdown_page_scan_executor
 
 configure_logging()
 
-app = FastAPI(title=settings.app_title)
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    """Create the workflow pool up front and stop worker threads/processes on shutdown."""
+    get_workflow_executor()
+    try:
+        yield
+    finally:
+        shutdown_workflow_executor()
+        shutdown_page_scan_executor()
+
+
+app = FastAPI(title=settings.app_title, lifespan=lifespan)
+app.add_middleware(RequestLoggingMiddleware)
 app.include_router(api_v1_router, prefix="/api/v1")
 
 
@@ -43,15 +61,15 @@ def health_legacy():
 
 
 @app.post("/run-agent")
-def run_agent_legacy(req: RunAgentRequest):
-    return handle_run_agent_request(req, route_path="/run-agent")
+async def run_agent_legacy(req: RunAgentRequest):
+    return await handle_run_agent_request(req, route_path="/run-agent")
 
 
 @app.post("/run-agent/stream")
-def run_agent_stream_legacy(req: RunAgentRequest):
+async def run_agent_stream_legacy(req: RunAgentRequest):
     return handle_run_agent_stream_request(req, route_path="/run-agent/stream")
 
 
 @app.post("/chat/stream")
-def chat_stream_legacy(req: ChatStreamRequest):
+async def chat_stream_legacy(req: ChatStreamRequest):
     return handle_chat_stream_request(req, route_path="/chat/stream")
@@ -22,14 +22,25 @@ Errors/Exceptions:
 """
 
 import ast
+import asyncio
+import copy
+import hashlib
+import heapq
 import json
+import logging
 import os
 import re
+import string
+import threading
 import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
 from typing import Any, Iterator, Optional
 
+import orjson
+from json_repair import repair_json
 from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
-from langchain_core.prompts import ChatPromptTemplate
 
 from ..clients.llm_client import build_nvidia_chat_client
 from ..core.logging import get_logger
@@ -41,6 +52,65 @@ TEMPERATURE = 1
 TOP_P = 1
 MAX_OUTPUT_TOKENS = 4096
 MAX_RETRIES = 2
+PROMPT_BASED_STREAM_TIMEOUT_SECONDS = 180.0
+MAX_BATCH_CONCURRENCY = 8
+# When racing strategies, give structured output a head start before paying for the fallback.
+RACE_PROMPT_DELAY_SECONDS = 2.0
+# Token-level provider deltas are coalesced before they become SSE frames: a batch is
+# emitted once it holds this many chars or this long has passed since the last flush,
+# checked on each incoming chunk (a delta that arrives after a quiet spell goes out at
+# once; one buffered before a stall waits for the next chunk or the end of the stream).
+STREAM_FLUSH_MIN_CHARS = 256
+STREAM_FLUSH_MAX_DELAY_SECONDS = 0.05
+
+# Attached-file text is the bulk of the guide prompt; past this budget the middle is dropped.
+PROMPT_PDF_DEFAULT_MAX_CHARS = 60000
+
+RESPONSE_CACHE_MAX_ENTRIES = 1024
+RESPONSE_CACHE_DEFAULT_TTL_SECONDS = 3600.0
+# Fields that change between otherwise identical payloads without changing the guide:
+# request bookkeeping and the extension's detection metadata. `userId` stays in the
+# key so one user's generated guide is never served to another.
+RESPONSE_CACHE_VOLATILE_KEYS = frozenset({"requestId", "timestamp", "detectedAt", "status"})
+PREPARED_PAYLOAD_JSON_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+
+# Text wrappers put their `type` key first: {'type': 'text', ...} or [{"type": "text", ...}].
+TEXT_WRAPPER_PREFIX_PATTERN = re.compile(r"""\[?\s*\{\s*['"]type['"]\s*:\s*['"]text['"]""")
+
+# `raw_decode` parses one value from an offset and ignores whatever follows it.
+JSON_OBJECT_DECODER = json.JSONDecoder()
+
+# Inserted where the middle of oversized attached-file text was dropped.
+TRUNCATION_MARKER = "\n\n...[truncated {dropped} chars]...\n\n"
+
+# `format_attachment_block` output: opening tag, body, closing tag.
+ATTACHMENT_BLOCK_PATTERN = re.compile(r"(<attachment\b[^>]*>\n)(.*?)(\n</attachment>)", re.DOTALL)
+
+JSON_FENCE_OPEN_PATTERN = re.compile(r"^```(?:json)?\s*", re.IGNORECASE)
+MARKDOWN_FENCE_OPEN_PATTERN = re.compile(r"^```(?:markdown|md)?\s*", re.IGNORECASE)
+
+# String opener -> characters that close it during JSON repair.
+JSON_REPAIR_STRING_DELIMITERS = {
+    '"': '"',
+    "'": "'",
+    "\u201c": "\u201d\u201c\"",
+    "\u201d": "\u201d\u201c\"",
+    "\u2018": "\u2019\u2018'",
+    "\u2019": "\u2019\u2018'",
+}
+JSON_REPAIR_CONTROL_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t", "\b": "\\b", "\f": "\\f"}
+JSON_REPAIR_IDENT_START = frozenset(string.ascii_letters + "_")
+JSON_REPAIR_IDENT_CHARS = frozenset(string.ascii_letters + string.digits + "_")
+JSON_REPAIR_WHITESPACE = frozenset(" \t\r\n")
+
+_response_cache: "OrderedDict[bytes, tuple[float, dict]]" = OrderedDict()
+_response_cache_lock = threading.Lock()
+_response_cache_hits = 0
+_response_cache_misses = 0
+
+STRUCTURED_LLM_CACHE_MAX_ENTRIES = 8
+_structured_llm_cache: dict[int, tuple[Any, Any]] = {}
+_structured_llm_lock = threading.Lock()
 
 SYSTEM_PROMPT = """\
 ## Role
@@ -92,21 +162,38 @@ Rules for the markdown body:
 - Do not wrap the JSON in markdown fences. Return the raw JSON object only.\
 """
 
-HUMAN_TEMPLATE = """\
-Analyze the following assignment and produce a structured guide.
-
-Assignment payload:
-{payload}
-
-Student's timezone: {timezone}
+def _build_human_prompt(payload: str, pdf_text: str, timezone: str, visual_signals: str) -> str:
+    """Guide user prompt; an f-string avoids str.format's template parsing per request."""
+    return (
+        "Analyze the following assignment and produce a structured guide.\n"
+        "\n"
+        "Assignment payload:\n"
+        f"{payload}\n"
+        "\n"
+        f"Student's timezone: {timezone}\n"
+        "\n"
+        "Visual emphasis context (high/medium significance markers from PDF annotations/styles):\n"
+        f"{visual_signals}\n"
+        "\n"
+        'Attached files — each block is tagged with name and source="assignment":\n'
+        f"{pdf_text}"
+    )
 
-Visual emphasis context (high/medium significance markers from PDF annotations/styles):
-{visual_signals}
+# Appended after the shared guide prompt so the JSON fallback reuses the structured
+# attempt's prompt prefix (system prompt, payload, and file text) on prefix-caching providers.
+JSON_OUTPUT_INSTRUCTIONS = """\
+Return STRICT JSON ONLY (no markdown fences wrapping the JSON, no commentary outside the object).
+Use DOUBLE QUOTES for all keys and string values. No trailing commas.
 
-Attached files — each block is tagged with name and source="assignment":
-{pdf_text}\
+Return a JSON object matching this schema:
+{
+  "guideMarkdown": "single markdown guide body with headings and bullet lists"
+}\
 """
 
+# Built once: message construction runs pydantic validation on every call.
+_SYSTEM_MSG = SystemMessage(content=SYSTEM_PROMPT)
+
 SYSTEM_PROMPT_MARKDOWN = """\
 ## Role
 You are Headstart, an academic assistant that helps students understand Canvas assignments.
@@ -157,19 +244,27 @@ Rules:
 - Begin your response immediately with `## Assignment Overview` — output nothing before it.\
 """
 
+_MARKDOWN_SYSTEM_MSG = SystemMessage(content=SYSTEM_PROMPT_MARKDOWN)
+
 
 def _to_text(x):
-    """Normalize LangChain outputs into a plain string."""
-    if x is None:
-        return ""
-    if isinstance(x, str):
-        return x
-    if isinstance(x, list):
-        return "\n".join(_to_text(i) for i in x)
-    content = getattr(x, "content", None)
-    if content is not None:
-        return _to_text(content)
-    return str(x)
+    """Normalize LangChain outputs into a plain string, peeling nested `.content` iteratively."""
+    while True:
+        if type(x) is str:
+            return x
+        # Fast path for message chunks whose content is already a plain string.
+        content = getattr(x, "content", None)
+        if type(content) is str:
+            return content
+        if x is None:
+            return ""
+        if isinstance(x, str):
+            return x
+        if isinstance(x, list):
+            return "\n".join([_to_text(i) for i in x])
+        if content is None:
+            return str(x)
+        x = content
 
 
 def _extract_reasoning_content(x: Any) -> str:
@@ -201,16 +296,46 @@ def _extract_reasoning_content(x: Any) -> str:
     return ""
 
 
-def _compute_stream_delta(new_text: str, existing_text: str) -> tuple[str, str]:
+class _StreamDeltaTracker:
     """
-    Compute incremental stream delta.
+    Turn provider stream chunks into incremental deltas.
+
     Supports providers that stream cumulative content and providers that stream deltas.
+    Accumulated text is kept as a list of parts, so delta streams cost O(1) per chunk
+    instead of rebuilding the whole string each time.
     """
-    if not new_text:
-        return "", existing_text
-    if new_text.startswith(existing_text):
-        return new_text[len(existing_text) :], new_text
-    return new_text, f"{existing_text}{new_text}"
+
+    __slots__ = ("_parts", "_length", "_last_chunk")
+
+    def __init__(self) -> None:
+        self._parts: list[str] = []
+        self._length = 0
+        self._last_chunk = ""
+
+    def push(self, new_text: str) -> str:
+        if not new_text:
+            return ""
+        # The previous chunk equals everything seen so far only when the stream is cumulative
+        # (or it was the first chunk); only then can `new_text` extend it.
+        if len(self._last_chunk) == self._length and new_text.startswith(self._last_chunk):
+            delta = new_text[self._length :]
+            self._parts = [new_text]
+            self._length = len(new_text)
+        else:
+            delta = new_text
+            self._parts.append(new_text)
+            self._length += len(new_text)
+        self._last_chunk = new_text
+        return delta
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def text(self) -> str:
+        if len(self._parts) > 1:
+            self._parts = ["".join(self._parts)]
+        return self._parts[0] if self._parts else ""
 
 
 def _request_kwargs() -> dict[str, Any]:
@@ -222,42 +347,189 @@ def _stream_message_deltas(
     messages: list[BaseMessage],
     include_thinking: bool = False,
 ) -> Iterator[dict[str, str]]:
-    """Yield answer deltas, plus reasoning deltas when requested, from provider streaming."""
-    seen_content = ""
-    seen_reasoning = ""
+    """
+    Yield answer deltas, plus reasoning deltas when requested, from provider streaming.
+
+    Small deltas are batched (see `STREAM_FLUSH_MIN_CHARS`) so each yielded item,
+    and therefore each SSE frame, carries a meaningful amount of text.
+    """
+    content_tracker = _StreamDeltaTracker()
+    reasoning_tracker = _StreamDeltaTracker()
+    content_buf: list[str] = []
+    reasoning_buf: list[str] = []
+    buffered_chars = 0
+    last_flush = time.monotonic()
     for chunk in llm.stream(messages, **_request_kwargs()):
-        content_delta, seen_content = _compute_stream_delta(_to_text(chunk), seen_content)
+        content_delta = content_tracker.push(_to_text(chunk))
         reasoning_delta = ""
         if include_thinking:
-            reasoning_delta, seen_reasoning = _compute_stream_delta(
-                _extract_reasoning_content(chunk),
-                seen_reasoning,
-            )
-        if content_delta or reasoning_delta:
+            reasoning_delta = reasoning_tracker.push(_extract_reasoning_content(chunk))
+        if not content_delta and not reasoning_delta:
+            continue
+        if content_delta:
+            content_buf.append(content_delta)
+        if reasoning_delta:
+            reasoning_buf.append(reasoning_delta)
+        buffered_chars += len(content_delta) + len(reasoning_delta)
+        now = time.monotonic()
+        if buffered_chars >= STREAM_FLUSH_MIN_CHARS or now - last_flush >= STREAM_FLUSH_MAX_DELAY_SECONDS:
             yield {
-                "content_delta": content_delta,
-                "reasoning_delta": reasoning_delta,
+                "content_delta": "".join(content_buf),
+                "reasoning_delta": "".join(reasoning_buf),
             }
+            content_buf.clear()
+            reasoning_buf.clear()
+            buffered_chars = 0
+            last_flush = now
+    if buffered_chars:
+        yield {
+            "content_delta": "".join(content_buf),
+            "reasoning_delta": "".join(reasoning_buf),
+        }
+
+
+def _dumps_json(value: Any) -> str:
+    """Serialize prompt data as compact UTF-8 JSON text."""
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
 
 
 def _maybe_unwrap_text_dict(text: str) -> str:
-    """Unwrap google-genai text wrappers like {'type': 'text', 'text': '...'}."""
+    """
+    Unwrap google-genai text wrappers like {'type': 'text', 'text': '...'}.
+
+    Always returns stripped text, so callers never need a second `.strip()`.
+    """
     if not text:
         return text
     s = text.strip()
-    if not (s.startswith("{") or s.startswith("[")) and "{'type'" not in s:
-        return text
+    if not s.startswith(("{", "[")) or not TEXT_WRAPPER_PREFIX_PATTERN.match(s):
+        return s
     try:
-        obj = ast.literal_eval(s)
-        if isinstance(obj, dict) and "text" in obj and isinstance(obj["text"], str):
-            return obj["text"]
-        if isinstance(obj, list) and len(obj) > 0:
-            first = obj[0]
-            if isinstance(first, dict) and "text" in first and isinstance(first["text"], str):
-                return first["text"]
-    except Exception:
-        pass
-    return text
+        # JSON-shaped wrappers parse without building a Python AST.
+        obj = orjson.loads(s)
+    except orjson.JSONDecodeError:
+        try:
+            obj = ast.literal_eval(s)
+        except Exception:
+            return s
+    if isinstance(obj, list):
+        obj = obj[0] if obj else None
+    if isinstance(obj, dict) and isinstance(obj.get("text"), str):
+        return obj["text"].strip()
+    return s
+
+
+def _repair_json(raw: str) -> str:
+    """
+    Repair common model JSON mistakes in a single pass.
+
+    Converts single- and smart-quoted strings to double-quoted strings, quotes bare
+    object keys, drops trailing commas, and escapes raw control characters inside
+    strings. Content inside well-formed strings (apostrophes, typographic quotes) is
+    copied verbatim.
+    """
+    out: list[str] = []
+    n = len(raw)
+    i = 0
+    closers = ""
+    last_significant = ""
+    while i < n:
+        ch = raw[i]
+
+        if closers:
+            if ch == "\\":
+                escaped = raw[i + 1 : i + 2]
+                out.append("'" if escaped == "'" else raw[i : i + 2])
+                i += 2
+                continue
+            if ch in closers:
+                out.append('"')
+                closers = ""
+                last_significant = '"'
+            elif ch == '"':
+                out.append('\\"')
+            elif ch < " " or ch == "\x7f":
+                out.append(JSON_REPAIR_CONTROL_ESCAPES.get(ch, ""))
+            else:
+                out.append(ch)
+            i += 1
+            continue
+
+        if ch in JSON_REPAIR_STRING_DELIMITERS:
+            closers = JSON_REPAIR_STRING_DELIMITERS[ch]
+            out.append('"')
+            i += 1
+            continue
+
+        if ch == ",":
+            j = i + 1
+            while j < n and (raw[j] in JSON_REPAIR_WHITESPACE or raw[j] < " "):
+                j += 1
+            if j < n and raw[j] in "}]":
+                i = j
+                continue
+            out.append(ch)
+            last_significant = ch
+            i += 1
+            continue
+
+        if ch in JSON_REPAIR_IDENT_START:
+            j = i + 1
+            while j < n and raw[j] in JSON_REPAIR_IDENT_CHARS:
+                j += 1
+            word = raw[i:j]
+            k = j
+            while k < n and raw[k] in JSON_REPAIR_WHITESPACE:
+                k += 1
+            if last_significant in ("{", ",") and k < n and raw[k] == ":":
+                out.append(f'"{word}"')
+            else:
+                out.append(word)
+            last_significant = word[-1]
+            i = j
+            continue
+
+        if ch < " " or ch == "\x7f":
+            if ch in JSON_REPAIR_WHITESPACE:
+                out.append(ch)
+            i += 1
+            continue
+
+        out.append(ch)
+        if not ch.isspace():
+            last_significant = ch
+        i += 1
+
+    return "".join(out)
+
+
+def _extract_json_span(text: str) -> Optional[str]:
+    """Return the first complete top-level `{...}` block, ignoring braces inside strings."""
+    start = text.find("{")
+    if start == -1:
+        return None
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start : i + 1]
+    return None
 
 
 def _try_parse_json(text: str) -> dict:
@@ -265,45 +537,81 @@ def _try_parse_json(text: str) -> dict:
     if not text:
         raise ValueError("Empty model output; cannot extract JSON.")
 
+    # Fast path: well-formed output (the common case) needs no cleanup at all.
+    try:
+        parsed = orjson.loads(text)
+    except orjson.JSONDecodeError:
+        pass
+    else:
+        if isinstance(parsed, dict):
+            return parsed
+
+    # Fences only ever sit at the ends: inspect those instead of scanning the whole text.
     text = text.strip()
-    text = re.sub(r"^```(?:json)?\s*", "", text, flags=re.IGNORECASE)
-    text = re.sub(r"\s*```$", "", text)
+    if text.startswith("```"):
+        text = text[JSON_FENCE_OPEN_PATTERN.match(text).end() :]
+        if text.endswith("```"):
+            text = text[:-3].rstrip()
 
+    # Object followed by commentary: the C scanner stops at the end of the object,
+    # so no Python-level brace walk or substring copy is needed.
     start = text.find("{")
-    end = text.rfind("}")
-    if start == -1 or end == -1 or end <= start:
-        raise ValueError("No JSON object found in model output.")
-    raw = text[start : end + 1]
+    if start != -1:
+        try:
+            parsed, _ = JSON_OBJECT_DECODER.raw_decode(text, start)
+        except json.JSONDecodeError:
+            pass
+        else:
+            if isinstance(parsed, dict):
+                return parsed
+
+    raw = _extract_json_span(text)
+    if raw is None:
+        # Unbalanced (e.g. truncated or single-quoted) output: let repair work on the widest span.
+        start = text.find("{")
+        end = text.rfind("}")
+        if start == -1 or end == -1 or end <= start:
+            raise ValueError("No JSON object found in model output.")
+        raw = text[start : end + 1]
 
     try:
-        return json.loads(raw)
-    except json.JSONDecodeError:
+        return orjson.loads(raw)
+    except orjson.JSONDecodeError:
         pass
 
-    repaired = (
-        raw.replace("\u201c", '"')
-        .replace("\u201d", '"')
-        .replace("\u2018", "'")
-        .replace("\u2019", "'")
-        .replace("'", '"')
-    )
-    repaired = re.sub(r",\s*([}\]])", r"\1", repaired)
-    repaired = re.sub(r"[\x00-\x1F\x7F]", "", repaired)
-    repaired = re.sub(r'([{,]\s*)([A-Za-z_][A-Za-z0-9_]*)(\s*):', r'\1"\2"\3:', repaired)
+    repaired = _repair_json(raw)
 
     try:
-        return json.loads(repaired)
-    except json.JSONDecodeError as e:
+        return orjson.loads(repaired)
+    except orjson.JSONDecodeError as e:
         snippet = repaired[:500]
         raise ValueError(f"Could not parse model output as JSON. {e}. Snippet: {snippet}")
 
 
+def _repair_truncated_json(text: str) -> Optional[dict]:
+    """
+    Last resort for output cut off mid-object (e.g. at the token limit).
+
+    `json_repair` closes open strings and containers; it is much slower than
+    `_repair_json`, so it only runs once a finished response failed to parse.
+    """
+    start = text.find("{")
+    if start == -1:
+        return None
+    try:
+        parsed = repair_json(text[start:], skip_json_loads=True, return_objects=True)
+    except Exception:
+        return None
+    return parsed if isinstance(parsed, dict) and parsed else None
+
+
 def _format_visual_signals_for_prompt(visual_signals: Optional[list[dict]]) -> str:
     if not visual_signals:
         return "(none)"
 
-    ranked = sorted(
-        [s for s in visual_signals if isinstance(s, dict)],
+    ranked = heapq.nsmallest(
+        40,
+        (s for s in visual_signals if isinstance(s, dict)),
         key=lambda s: (
             -float(s.get("score", 0.0)),
             int(s.get("page", 0)),
@@ -311,48 +619,246 @@ def _format_visual_signals_for_prompt(visual_signals: Optional[list[dict]]) -> s
         ),
     )
     lines = []
-    for sig in ranked[:40]:
+    for sig in ranked:
         text = str(sig.get("text", "")).strip()
         if not text:
             continue
+        types = ",".join(sig.get("signal_types", [])) or "unknown"
         lines.append(
-            "- [{file} p{page}] {text} | signals={types} | significance={siglvl} | score={score}".format(
-                file=sig.get("file", "?"),
-                page=sig.get("page", "?"),
-                text=text,
-                types=",".join(sig.get("signal_types", [])) or "unknown",
-                siglvl=sig.get("significance", "unknown"),
-                score=sig.get("score", "?"),
-            )
+            f"- [{sig.get('file', '?')} p{sig.get('page', '?')}] {text} | signals={types}"
+            f" | significance={sig.get('significance', 'unknown')} | score={sig.get('score', '?')}"
         )
     return "\n".join(lines) if lines else "(none)"
 
 
-def _try_structured_output(
-    llm,
-    payload_str: str,
+def _prompt_pdf_max_chars() -> int:
+    """Read the guide prompt file-text budget; zero or negative disables trimming."""
+    raw = os.getenv("HEADSTART_MAX_PDF_CHARS", str(PROMPT_PDF_DEFAULT_MAX_CHARS))
+    try:
+        return int(raw)
+    except ValueError:
+        return PROMPT_PDF_DEFAULT_MAX_CHARS
+
+
+def _trim_text_middle(text: str, max_chars: int) -> str:
+    """Keep the head and tail of `text` within `max_chars`, cutting at line or sentence breaks."""
+    if len(text) <= max_chars:
+        return text
+
+    # The marker counts against the budget; size it for the largest possible drop.
+    keep = max_chars - len(TRUNCATION_MARKER.format(dropped=len(text)))
+    if keep <= 0:
+        return text[:max_chars]
+    half = keep // 2
+    head_end = max(text.rfind("\n", 0, half), text.rfind(". ", 0, half) + 1)
+    if head_end <= half // 2:
+        head_end = half
+    tail_start = text.find("\n", len(text) - half)
+    if tail_start == -1 or tail_start - (len(text) - half) > half // 2:
+        tail_start = len(text) - half
+    marker = TRUNCATION_MARKER.format(dropped=tail_start - head_end)
+    return f"{text[:head_end]}{marker}{text[tail_start:].lstrip()}"
+
+
+def _fair_shares(lengths: list[int], budget: int) -> list[int]:
+    """Split `budget` so pieces under an equal share keep everything and the rest share what is left."""
+    shares = [0] * len(lengths)
+    remaining = budget
+    order = sorted(range(len(lengths)), key=lengths.__getitem__)
+    for position, index in enumerate(order):
+        shares[index] = min(lengths[index], remaining // (len(order) - position))
+        remaining -= shares[index]
+    return shares
+
+
+def _trim_pdf_text_for_prompt(pdf_text: str) -> str:
+    """
+    Keep the head and tail of oversized file text, cutting at line or sentence breaks.
+
+    Assignment specs front-load requirements and end with rubrics and deadlines, so
+    the middle is the cheapest part to drop when the prompt budget is exceeded.
+    Each attachment block is trimmed against its own share of the budget and its
+    tags are kept whole, so no file is dropped outright.
+    """
+    max_chars = _prompt_pdf_max_chars()
+    if max_chars <= 0 or len(pdf_text) <= max_chars:
+        return pdf_text
+
+    # (opening tag, body, closing tag); text outside blocks is an untagged piece.
+    pieces: list[tuple[str, str, str]] = []
+    position = 0
+    for match in ATTACHMENT_BLOCK_PATTERN.finditer(pdf_text):
+        if match.start() > position:
+            pieces.append(("", pdf_text[position : match.start()], ""))
+        pieces.append(match.groups())
+        position = match.end()
+    if position < len(pdf_text):
+        pieces.append(("", pdf_text[position:], ""))
+
+    tag_chars = sum(len(open_tag) + len(close_tag) for open_tag, _, close_tag in pieces)
+    shares = _fair_shares([len(body) for _, body, _ in pieces], max(max_chars - tag_chars, 0))
+    trimmed = "".join(
+        f"{open_tag}{_trim_text_middle(body, share)}{close_tag}"
+        for (open_tag, body, close_tag), share in zip(pieces, shares)
+    )
+    logger.info(
+        "Trimmed attached file text for prompt | original_chars=%d kept_chars=%d attachments=%d",
+        len(pdf_text),
+        len(trimmed),
+        sum(1 for open_tag, _, _ in pieces if open_tag),
+    )
+    return trimmed
+
+
+def _response_cache_ttl_seconds() -> float:
+    """Read the guide response cache TTL; zero or negative disables caching."""
+    raw = os.getenv("HEADSTART_CACHE_TTL", str(RESPONSE_CACHE_DEFAULT_TTL_SECONDS))
+    try:
+        return float(raw)
+    except ValueError:
+        return RESPONSE_CACHE_DEFAULT_TTL_SECONDS
+
+
+@dataclass(frozen=True, slots=True)
+class _PreparedInputs:
+    """Guide prompt inputs serialized once and shared by every generation attempt."""
+
+    payload_json: str
+    pdf_text: str
+    timezone: str
+    visual_signals: str
+    cache_key: bytes
+
+
+def _response_cache_key(
+    payload: dict,
+    payload_json: bytes,
     pdf_text_str: str,
     timezone_str: str,
     visual_signals_str: str,
+) -> bytes:
+    """Hash the normalized prompt inputs so near-duplicate requests share a cache entry."""
+    stable_json = payload_json
+    if not RESPONSE_CACHE_VOLATILE_KEYS.isdisjoint(payload):
+        stable_json = orjson.dumps(
+            {key: value for key, value in payload.items() if key not in RESPONSE_CACHE_VOLATILE_KEYS},
+            option=PREPARED_PAYLOAD_JSON_OPTIONS,
+            default=str,
+        )
+    canonical = b"\x1e".join(
+        (
+            stable_json,
+            pdf_text_str.encode("utf-8"),
+            timezone_str.encode("utf-8"),
+            visual_signals_str.encode("utf-8"),
+        )
+    )
+    return hashlib.blake2b(canonical, digest_size=16).digest()
+
+
+def _prepare(
+    payload: dict,
+    pdf_text: str,
+    visual_signals: Optional[list[dict]] = None,
+) -> _PreparedInputs:
+    """Serialize the payload once (sorted keys) and derive every prompt input plus the cache key."""
+    payload_json = orjson.dumps(payload, option=PREPARED_PAYLOAD_JSON_OPTIONS, default=str)
+    pdf_text_str = _trim_pdf_text_for_prompt(pdf_text) if pdf_text else "(no attached files)"
+    timezone_str = payload.get("userTimezone") or "Not specified (use due date as-is)"
+    visual_signals_str = _format_visual_signals_for_prompt(visual_signals)
+    return _PreparedInputs(
+        payload_json=payload_json.decode("utf-8"),
+        pdf_text=pdf_text_str,
+        timezone=timezone_str,
+        visual_signals=visual_signals_str,
+        cache_key=_response_cache_key(
+            payload, payload_json, pdf_text_str, timezone_str, visual_signals_str
+        ),
+    )
+
+
+def _get_cached_response(key: bytes) -> Optional[dict]:
+    global _response_cache_hits, _response_cache_misses
+    with _response_cache_lock:
+        entry = _response_cache.get(key)
+        if entry is not None and entry[0] <= time.monotonic():
+            del _response_cache[key]
+            entry = None
+        if entry is None:
+            _response_cache_misses += 1
+            return None
+        _response_cache_hits += 1
+        _response_cache.move_to_end(key)
+        return copy.deepcopy(entry[1])
+
+
+def _response_cache_stats() -> dict[str, int]:
+    with _response_cache_lock:
+        return {
+            "hits": _response_cache_hits,
+            "misses": _response_cache_misses,
+            "entries": len(_response_cache),
+        }
+
+
+def _store_cached_response(key: bytes, result: dict, ttl_seconds: float) -> None:
+    with _response_cache_lock:
+        _response_cache[key] = (time.monotonic() + ttl_seconds, copy.deepcopy(result))
+        _response_cache.move_to_end(key)
+        while len(_response_cache) > RESPONSE_CACHE_MAX_ENTRIES:
+            _response_cache.popitem(last=False)
+
+
+def _clear_response_cache() -> None:
+    global _response_cache_hits, _response_cache_misses
+    with _response_cache_lock:
+        _response_cache.clear()
+        _response_cache_hits = 0
+        _response_cache_misses = 0
+
+
+def _build_guide_messages(inputs: _PreparedInputs, output_instructions: str = "") -> list[BaseMessage]:
+    human_content = _build_human_prompt(
+        payload=inputs.payload_json,
+        pdf_text=inputs.pdf_text,
+        timezone=inputs.timezone,
+        visual_signals=inputs.visual_signals,
+    )
+    if output_instructions:
+        human_content = f"{human_content}\n\n{output_instructions}"
+    return [_SYSTEM_MSG, HumanMessage(content=human_content)]
+
+
+def _get_structured_llm(llm):
+    """
+    Return the schema-bound runnable for `llm`, building it once per client.
+
+    `with_structured_output` binds tools and an output parser on every call; clients
+    are memoized upstream, so keying on identity keeps this small. The client is held
+    alongside its runnable so its `id` cannot be reused while cached.
+    """
+    key = id(llm)
+    with _structured_llm_lock:
+        entry = _structured_llm_cache.get(key)
+        if entry is None or entry[0] is not llm:
+            if len(_structured_llm_cache) >= STRUCTURED_LLM_CACHE_MAX_ENTRIES:
+                _structured_llm_cache.clear()
+            entry = (llm, llm.with_structured_output(RunAgentResponse))
+            _structured_llm_cache[key] = entry
+        return entry[1]
+
+
+def _try_structured_output(
+    llm,
+    inputs: _PreparedInputs,
 ) -> Optional[dict]:
     """
     Use LangChain's with_structured_output() to get schema-conforming output.
     Returns None if this approach fails (so caller can fall back).
     """
     try:
-        structured_llm = llm.with_structured_output(RunAgentResponse)
-
-        messages = [
-            SystemMessage(content=SYSTEM_PROMPT),
-            HumanMessage(
-                content=HUMAN_TEMPLATE.format(
-                    payload=payload_str,
-                    pdf_text=pdf_text_str,
-                    timezone=timezone_str,
-                    visual_signals=visual_signals_str,
-                )
-            ),
-        ]
+        structured_llm = _get_structured_llm(llm)
+        messages = _build_guide_messages(inputs)
 
         logger.info("Invoking structured output chain…")
         t0 = time.time()
@@ -361,154 +867,399 @@ def _try_structured_output(
 
         elapsed_ms = int((time.time() - t0) * 1000)
         logger.info("Structured output returned in %dms", elapsed_ms)
+        return _structured_response_to_dict(response)
 
-        if response is None:
-            logger.warning("Structured output returned None")
-            return None
+    except Exception as e:
+        logger.warning("Structured output failed: %r", e)
+        return None
 
-        result = response.model_dump()
-        logger.info("Structured output succeeded | keys=%s", list(result.keys()))
-        return result
+
+async def _atry_structured_output(
+    llm,
+    inputs: _PreparedInputs,
+) -> Optional[dict]:
+    """Async variant of `_try_structured_output` using the provider's `ainvoke`."""
+    try:
+        structured_llm = _get_structured_llm(llm)
+        messages = _build_guide_messages(inputs)
+
+        logger.info("Invoking structured output chain (async)…")
+        t0 = time.time()
+
+        response = await structured_llm.ainvoke(messages, **_request_kwargs())
+
+        elapsed_ms = int((time.time() - t0) * 1000)
+        logger.info("Structured output returned in %dms", elapsed_ms)
+        return _structured_response_to_dict(response)
 
     except Exception as e:
-        logger.warning("Structured output failed: %s", repr(e))
+        logger.warning("Structured output failed: %r", e)
         return None
 
 
-def _try_prompt_based(
-    llm,
-    payload_str: str,
-    pdf_text_str: str,
-    timezone_str: str,
-    visual_signals_str: str,
-) -> dict:
+def _structured_response_to_dict(response: Any) -> Optional[dict]:
+    if response is None:
+        logger.warning("Structured output returned None")
+        return None
+
+    result = response.model_dump()
+    logger.info("Structured output succeeded | keys=%s", list(result.keys()))
+    return result
+
+
+class _StreamedJsonCollector:
     """
-    Fallback: use a prompt that asks the model to return JSON directly,
-    then parse it with repair heuristics.
+    Accumulate JSON-mode stream chunks and parse as soon as a complete object arrives.
+
+    A running brace tally over each delta decides when a parse is worth attempting,
+    so generation is cut short instead of running to the token budget.
     """
-    prompt = ChatPromptTemplate.from_messages(
-        [
-            ("system", SYSTEM_PROMPT),
-            (
-                "human",
-                """\
-Return STRICT JSON ONLY (no markdown fences wrapping the JSON, no commentary outside the object).
-Use DOUBLE QUOTES for all keys and string values. No trailing commas.
 
-Return a JSON object matching this schema:
-{{
-  "guideMarkdown": "single markdown guide body with headings and bullet lists"
-}}
+    def __init__(self) -> None:
+        self.content = _StreamDeltaTracker()
+        self.depth = 0
+        self.deadline = time.monotonic() + PROMPT_BASED_STREAM_TIMEOUT_SECONDS
 
-Assignment payload:
-{payload}
+    def feed(self, chunk: Any) -> Optional[dict]:
+        delta = self.content.push(_to_text(chunk))
+        if not delta:
+            return None
+        self.depth += delta.count("{") - delta.count("}")
+        if self.depth <= 0 and delta.rstrip().endswith("}"):
+            try:
+                result = _try_parse_json(_maybe_unwrap_text_dict(self.content.text))
+            except ValueError:
+                pass
+            else:
+                logger.info("Prompt-based stream stopped early after %d chars", len(self.content))
+                return result
+        if time.monotonic() > self.deadline:
+            raise TimeoutError(
+                f"Prompt-based stream exceeded {PROMPT_BASED_STREAM_TIMEOUT_SECONDS:.0f}s"
+            )
+        return None
 
-Student's timezone: {timezone}
+    def finish(self) -> dict:
+        text = _maybe_unwrap_text_dict(self.content.text)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Model output (first 500 chars): %r", text[:500])
+        try:
+            return _try_parse_json(text)
+        except ValueError:
+            recovered = _repair_truncated_json(text)
+            if recovered is None:
+                raise
+            logger.warning("Recovered unparseable model output with json_repair | chars=%d", len(text))
+            return recovered
+
+
+def _stream_until_json(llm, messages: list[BaseMessage]) -> dict:
+    """Stream a JSON-mode response and stop as soon as a complete object parses."""
+    collector = _StreamedJsonCollector()
+    stream = llm.stream(messages, **_request_kwargs())
+    try:
+        for chunk in stream:
+            result = collector.feed(chunk)
+            if result is not None:
+                return result
+    finally:
+        close = getattr(stream, "close", None)
+        if callable(close):
+            close()
+    return collector.finish()
+
+
+async def _astream_until_json(llm, messages: list[BaseMessage]) -> dict:
+    """Async variant of `_stream_until_json` over the provider's `astream`."""
+    collector = _StreamedJsonCollector()
+    stream = llm.astream(messages, **_request_kwargs())
+    try:
+        async for chunk in stream:
+            result = collector.feed(chunk)
+            if result is not None:
+                return result
+    finally:
+        aclose = getattr(stream, "aclose", None)
+        if callable(aclose):
+            await aclose()
+    return collector.finish()
 
-Visual emphasis context:
-{visual_signals}
 
-Attached file contents:
-{pdf_text}""",
-            ),
-        ]
-    )
+def _try_prompt_based(
+    llm,
+    inputs: _PreparedInputs,
+) -> dict:
+    """
+    Fallback: use a prompt that asks the model to return JSON directly,
+    then parse it with repair heuristics. Responses are streamed and cut off
+    once a complete JSON object is available.
+    """
+    messages = _build_guide_messages(inputs, output_instructions=JSON_OUTPUT_INSTRUCTIONS)
 
     last_error = None
     for attempt in range(1, MAX_RETRIES + 1):
         try:
             logger.info("Prompt-based attempt %d/%d…", attempt, MAX_RETRIES)
             t0 = time.time()
-            messages = prompt.format_messages(
-                payload=payload_str,
-                pdf_text=pdf_text_str,
-                timezone=timezone_str,
-                visual_signals=visual_signals_str,
-            )
-
-            res = llm.invoke(messages, **_request_kwargs())
+            result = _stream_until_json(llm, messages)
 
             elapsed_ms = int((time.time() - t0) * 1000)
             logger.info("LLM returned in %dms (attempt %d)", elapsed_ms, attempt)
+            logger.info("Prompt-based parse succeeded | keys=%s", list(result.keys()))
+            return result
 
-            text = _to_text(res).strip()
-            text = _maybe_unwrap_text_dict(text).strip()
+        except Exception as e:
+            last_error = e
+            logger.warning("Attempt %d failed: %r", attempt, e)
 
-            logger.debug("Model output (first 500 chars): %r", text[:500])
+    raise RuntimeError(f"All {MAX_RETRIES} attempts failed. Last error: {last_error}")
+
+
+async def _atry_prompt_based(
+    llm,
+    inputs: _PreparedInputs,
+) -> dict:
+    """Async variant of `_try_prompt_based` using the provider's `astream`."""
+    messages = _build_guide_messages(inputs, output_instructions=JSON_OUTPUT_INSTRUCTIONS)
+
+    last_error = None
+    for attempt in range(1, MAX_RETRIES + 1):
+        try:
+            logger.info("Prompt-based attempt %d/%d (async)…", attempt, MAX_RETRIES)
+            t0 = time.time()
+            result = await _astream_until_json(llm, messages)
 
-            result = _try_parse_json(text)
+            elapsed_ms = int((time.time() - t0) * 1000)
+            logger.info("LLM returned in %dms (attempt %d)", elapsed_ms, attempt)
             logger.info("Prompt-based parse succeeded | keys=%s", list(result.keys()))
             return result
 
         except Exception as e:
             last_error = e
-            logger.warning("Attempt %d failed: %s", attempt, repr(e))
+            logger.warning("Attempt %d failed: %r", attempt, e)
 
     raise RuntimeError(f"All {MAX_RETRIES} attempts failed. Last error: {last_error}")
 
 
-def run_headstart_agent(payload: dict, pdf_text: str = "", visual_signals: Optional[list[dict]] = None) -> dict:
-    """
-    Run the Headstart AI agent using NVIDIA-hosted GPT-OSS 120B via LangChain.
+def _race_strategies_enabled() -> bool:
+    """Opt-in flag: racing both strategies roughly doubles LLM cost per request."""
+    raw = os.getenv("HEADSTART_RACE_STRATEGIES", "false").strip().lower()
+    return raw in {"1", "true", "yes", "on"}
 
-    Strategy:
-      1. Try structured output (with_structured_output) for reliable schema-conforming JSON.
-      2. If structured output fails, fall back to prompt-based generation with manual parsing.
+
+def _race_structured_and_prompt_based(
+    llm,
+    inputs: _PreparedInputs,
+) -> dict:
     """
-    api_key = os.getenv("NVIDIA_API_KEY")
-    if not api_key:
+    Run both generation strategies concurrently and return the first usable result.
+
+    Prompt-based generation starts after `RACE_PROMPT_DELAY_SECONDS`, or as soon as
+    structured output fails, whichever comes first. The race runs on a private event
+    loop inside the calling workflow thread, so the losing call is cancelled instead
+    of running on (and billing tokens) outside `AGENT_MAX_CONCURRENCY`.
+
+    ChatNVIDIA implements native `_agenerate`/`_astream` on aiohttp, so cancelling
+    the losing task closes its HTTP request. Unlike `asyncio.run`, the loop is closed
+    without waiting on its default executor: a client that falls back to
+    `run_in_executor` leaves its blocking call orphaned rather than holding this
+    thread until the losing request finishes.
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(_arace_structured_and_prompt_based(llm, inputs))
+    finally:
+        try:
+            pending = asyncio.all_tasks(loop)
+            for task in pending:
+                task.cancel()
+            if pending:
+                loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            loop.close()
+
+
+async def _arace_structured_and_prompt_based(
+    llm,
+    inputs: _PreparedInputs,
+) -> dict:
+    """Async variant of `_race_structured_and_prompt_based`; the losing task is cancelled."""
+    structured = asyncio.create_task(_atry_structured_output(llm, inputs))
+    tasks = {structured: "structured"}
+    try:
+        await asyncio.wait({structured}, timeout=RACE_PROMPT_DELAY_SECONDS)
+        if structured.done() and structured.result() is not None:
+            logger.info("structured strategy finished first")
+            return structured.result()
+        tasks[asyncio.create_task(_atry_prompt_based(llm, inputs))] = "prompt-based"
+        pending = set(tasks)
+        last_error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                try:
+                    result = task.result()
+                except Exception as e:
+                    last_error = e
+                    logger.warning("%s strategy failed: %r", tasks[task], e)
+                    continue
+                if result is not None:
+                    logger.info("%s strategy finished first", tasks[task])
+                    return result
+        raise RuntimeError(f"All generation strategies failed. Last error: {last_error}")
+    finally:
+        for task, name in tasks.items():
+            if not task.done():
+                logger.info("Cancelling %s strategy after the race was decided", name)
+                task.cancel()
+
+
+def _require_nvidia_api_key() -> None:
+    if not os.getenv("NVIDIA_API_KEY"):
         raise RuntimeError("NVIDIA_API_KEY is not set")
 
+
+def _lookup_cached_guide(inputs: _PreparedInputs) -> tuple[float, Optional[dict]]:
+    """Return `(ttl, cached_result)`; a non-positive TTL means caching is disabled."""
+    cache_ttl = _response_cache_ttl_seconds()
+    if cache_ttl <= 0:
+        return cache_ttl, None
+    cached = _get_cached_response(inputs.cache_key)
+    stats = _response_cache_stats()
     logger.info(
-        "Initializing LLM | model=%s temperature=%s top_p=%s max_tokens=%d",
-        MODEL_NAME,
-        TEMPERATURE,
-        TOP_P,
-        MAX_OUTPUT_TOKENS,
+        "Guide response cache %s | hits=%d misses=%d entries=%d",
+        "hit" if cached is not None else "miss",
+        stats["hits"],
+        stats["misses"],
+        stats["entries"],
     )
+    return cache_ttl, cached
 
-    llm = build_nvidia_chat_client(
+
+def _get_llm():
+    """Return the shared client for the pinned generation config (memoized in llm_client)."""
+    return build_nvidia_chat_client(
         model_name=MODEL_NAME,
         temperature=TEMPERATURE,
         max_tokens=MAX_OUTPUT_TOKENS,
         top_p=TOP_P,
     )
 
-    payload_str = json.dumps(payload, ensure_ascii=False)
-    pdf_text_str = pdf_text or "(no attached files)"
-    timezone_str = payload.get("userTimezone") or "Not specified (use due date as-is)"
-    visual_signals_str = _format_visual_signals_for_prompt(visual_signals)
 
-    result = _try_structured_output(
-        llm,
-        payload_str,
-        pdf_text_str,
-        timezone_str,
-        visual_signals_str,
+def _build_guide_llm():
+    logger.info(
+        "Initializing LLM | model=%s temperature=%s top_p=%s max_tokens=%d",
+        MODEL_NAME,
+        TEMPERATURE,
+        TOP_P,
+        MAX_OUTPUT_TOKENS,
     )
-    if result is not None:
-        return result
+    return _get_llm()
 
-    logger.info("Falling back to prompt-based generation")
-    return _try_prompt_based(
-        llm,
-        payload_str,
-        pdf_text_str,
-        timezone_str,
-        visual_signals_str,
+
+def run_headstart_agent(payload: dict, pdf_text: str = "", visual_signals: Optional[list[dict]] = None) -> dict:
+    """
+    Run the Headstart AI agent using NVIDIA-hosted GPT-OSS 120B via LangChain.
+
+    Strategy:
+      1. Try structured output (with_structured_output) for reliable schema-conforming JSON.
+      2. If structured output fails, fall back to prompt-based generation with manual parsing.
+    With `HEADSTART_RACE_STRATEGIES` enabled, both strategies run concurrently and the
+    first usable result wins.
+
+    Successful results are memoized in-process for `HEADSTART_CACHE_TTL` seconds
+    (default one hour, `0` disables) keyed on the normalized prompt inputs.
+    """
+    _require_nvidia_api_key()
+    inputs = _prepare(payload, pdf_text, visual_signals)
+    cache_ttl, cached = _lookup_cached_guide(inputs)
+    if cached is not None:
+        return cached
+
+    llm = _build_guide_llm()
+
+    if _race_strategies_enabled():
+        logger.info("Racing structured and prompt-based generation")
+        result = _race_structured_and_prompt_based(llm, inputs)
+    else:
+        result = _try_structured_output(llm, inputs)
+        if result is None:
+            logger.info("Falling back to prompt-based generation")
+            result = _try_prompt_based(llm, inputs)
+
+    if cache_ttl > 0:
+        _store_cached_response(inputs.cache_key, result, cache_ttl)
+    return result
+
+
+async def arun_headstart_agent(
+    payload: dict,
+    pdf_text: str = "",
+    visual_signals: Optional[list[dict]] = None,
+) -> dict:
+    """
+    Async variant of `run_headstart_agent` built on the provider's async API.
+
+    Follows the same structured-then-prompt-based strategy (or the strategy race
+    when `HEADSTART_RACE_STRATEGIES` is enabled) and shares the in-process response cache.
+    """
+    _require_nvidia_api_key()
+    inputs = _prepare(payload, pdf_text, visual_signals)
+    cache_ttl, cached = _lookup_cached_guide(inputs)
+    if cached is not None:
+        return cached
+
+    llm = _build_guide_llm()
+
+    if _race_strategies_enabled():
+        logger.info("Racing structured and prompt-based generation (async)")
+        result = await _arace_structured_and_prompt_based(llm, inputs)
+    else:
+        result = await _atry_structured_output(llm, inputs)
+        if result is None:
+            logger.info("Falling back to prompt-based generation")
+            result = await _atry_prompt_based(llm, inputs)
+
+    if cache_ttl > 0:
+        _store_cached_response(inputs.cache_key, result, cache_ttl)
+    return result
+
+
+async def run_headstart_agents(
+    items: list[tuple[dict, str, Optional[list[dict]]]],
+    return_exceptions: bool = False,
+) -> list:
+    """
+    Generate guides for independent `(payload, pdf_text, visual_signals)` items concurrently.
+
+    At most `MAX_BATCH_CONCURRENCY` provider calls are in flight at once. With
+    `return_exceptions=True`, failed items are returned as exception objects in place.
+    """
+    semaphore = asyncio.Semaphore(MAX_BATCH_CONCURRENCY)
+
+    async def _run_one(payload: dict, pdf_text: str, visual_signals: Optional[list[dict]]) -> dict:
+        async with semaphore:
+            return await arun_headstart_agent(payload, pdf_text, visual_signals=visual_signals)
+
+    return await asyncio.gather(
+        *(_run_one(payload, pdf_text, visual_signals) for payload, pdf_text, visual_signals in items),
+        return_exceptions=return_exceptions,
     )
 
 
 def _strip_markdown_fences(text: str) -> str:
     stripped = text.strip()
-    if stripped.startswith("```") and stripped.endswith("```"):
-        stripped = re.sub(r"^```(?:markdown|md)?\s*", "", stripped, flags=re.IGNORECASE)
-        stripped = re.sub(r"\s*```$", "", stripped)
+    if not (stripped.startswith("```") and stripped.endswith("```")):
+        return stripped
+    stripped = MARKDOWN_FENCE_OPEN_PATTERN.sub("", stripped)
+    if stripped.endswith("```"):
+        stripped = stripped[:-3]
     return stripped.strip()
 
 
 def _extract_markdown_payload(text: str) -> str:
-    cleaned = _strip_markdown_fences(_maybe_unwrap_text_dict(text).strip())
+    cleaned = _strip_markdown_fences(_maybe_unwrap_text_dict(text))
     if not cleaned:
         return ""
 
@@ -523,13 +1274,19 @@ def _extract_markdown_payload(text: str) -> str:
     return cleaned
 
 
-def _build_markdown_prompt() -> ChatPromptTemplate:
-    return ChatPromptTemplate.from_messages(
-        [
-            ("system", SYSTEM_PROMPT_MARKDOWN),
-            ("human", HUMAN_TEMPLATE),
-        ]
+def _build_markdown_messages(
+    payload_str: str,
+    pdf_text_str: str,
+    timezone_str: str,
+    visual_signals_str: str,
+) -> list[BaseMessage]:
+    human_content = _build_human_prompt(
+        payload=payload_str,
+        pdf_text=pdf_text_str,
+        timezone=timezone_str,
+        visual_signals=visual_signals_str,
     )
+    return [_MARKDOWN_SYSTEM_MSG, HumanMessage(content=human_content)]
 
 
 def stream_headstart_agent_markdown(
@@ -552,24 +1309,13 @@ def stream_headstart_agent_markdown(
         MAX_OUTPUT_TOKENS,
     )
 
-    llm = build_nvidia_chat_client(
-        model_name=MODEL_NAME,
-        temperature=TEMPERATURE,
-        max_tokens=MAX_OUTPUT_TOKENS,
-        top_p=TOP_P,
-    )
-    prompt = _build_markdown_prompt()
+    llm = _get_llm()
 
-    payload_str = json.dumps(payload, ensure_ascii=False)
-    pdf_text_str = pdf_text or "(no attached files)"
+    payload_str = _dumps_json(payload)
+    pdf_text_str = _trim_pdf_text_for_prompt(pdf_text) if pdf_text else "(no attached files)"
     timezone_str = payload.get("userTimezone") or "Not specified (use due date as-is)"
     visual_signals_str = _format_visual_signals_for_prompt(visual_signals)
-    messages = prompt.format_messages(
-        payload=payload_str,
-        pdf_text=pdf_text_str,
-        timezone=timezone_str,
-        visual_signals=visual_signals_str,
-    )
+    messages = _build_markdown_messages(payload_str, pdf_text_str, timezone_str, visual_signals_str)
 
     logger.info("Streaming markdown response from provider")
     yielded = False
@@ -627,7 +1373,7 @@ the assignment metadata ("Assignment Metadata"). Each entry shows its source lab
 and relevance score. When a student asks about specific assignment content (e.g., "what does
 question 3 say?", "what are the submission requirements?"), prioritize these retrieved snippets —
 they are the most targeted excerpts for the current query. When the "Attached files" section is
-empty, assignment PDF content has been fully routed to the retrieved context snippets above.
+empty, assignment PDF content has been fully routed to the retrieved context snippets.
 
 ## Attached File Format
 Attached files arrive in structured blocks:
@@ -694,7 +1440,7 @@ If the student requests changes to a prior proposal, re-select from available sl
 If scheduling sessions were selected, append this machine-readable block at the very END of your
 response (never in the middle, never if no sessions were chosen):
   <calendar_proposal>
-  {{"sessions":[{{"start_iso":"...","end_iso":"...","focus":"...","priority":"high|medium|low"}}]}}
+  {"sessions":[{"start_iso":"...","end_iso":"...","focus":"...","priority":"high|medium|low"}]}
   </calendar_proposal>
 
 If no `calendar_context` is provided but the student asks about scheduling, explain that live
@@ -713,31 +1459,43 @@ calendar data is unavailable and suggest they open the Calendar Planner page.
 - End with a concrete next step whenever the student's question is task-oriented.\
 """
 
-HUMAN_TEMPLATE_CHAT = """\
-Student request (highest priority for guide updates):
-{user_message}
-
-Recent chat history (source of preferences, opinions, and constraints):
-{chat_history}
-
-Assignment payload:
-{payload}
-
-Generated assignment guide (reference draft, may need major changes):
-{guide_markdown}
-
-Retrieved context snippets:
-{retrieval_context}
-
-Assignment files (type="pdf", source="assignment"):
-{assignment_pdf_text}
-
-User-uploaded files (PDFs and images, source="user_upload"):
-{user_attachments_context}
-
-Calendar context (free slots):
-{calendar_context}
-"""
+# Ordered from most to least stable across turns of a session so providers with
+# prefix caching can reuse the assignment context; per-turn fields come last.
+def _build_chat_human_prompt(
+    payload: str,
+    guide_markdown: str,
+    assignment_pdf_text: str,
+    user_attachments_context: str,
+    calendar_context: str,
+    retrieval_context: str,
+    chat_history: str,
+    user_message: str,
+) -> str:
+    return (
+        "Assignment payload:\n"
+        f"{payload}\n"
+        "\n"
+        "Generated assignment guide (reference draft, may need major changes):\n"
+        f"{guide_markdown}\n"
+        "\n"
+        'Assignment files (type="pdf", source="assignment"):\n'
+        f"{assignment_pdf_text}\n"
+        "\n"
+        'User-uploaded files (PDFs and images, source="user_upload"):\n'
+        f"{user_attachments_context}\n"
+        "\n"
+        "Calendar context (free slots):\n"
+        f"{calendar_context}\n"
+        "\n"
+        "Retrieved context snippets:\n"
+        f"{retrieval_context}\n"
+        "\n"
+        "Recent chat history (source of preferences, opinions, and constraints):\n"
+        f"{chat_history}\n"
+        "\n"
+        "Student request (highest priority for guide updates):\n"
+        f"{user_message}\n"
+    )
 
 MAX_CHAT_PAYLOAD_CHARS = 12000
 MAX_CHAT_GUIDE_CHARS = 32000
@@ -762,6 +1520,7 @@ CHAT_PAYLOAD_DROP_KEYS = {
     "rawPayload",
 }
 BASE64_SAMPLE_PATTERN = re.compile(r"^[A-Za-z0-9+/=]+$")
+WHITESPACE_RUN_PATTERN = re.compile(r"\s+")
 
 
 def _truncate_for_chat(text: str, max_chars: int) -> str:
@@ -772,7 +1531,7 @@ def _truncate_for_chat(text: str, max_chars: int) -> str:
 
 
 def _looks_like_base64_blob(text: str) -> bool:
-    compact = re.sub(r"\s+", "", text)
+    compact = WHITESPACE_RUN_PATTERN.sub("", text)
     if len(compact) < 1200:
         return False
 
@@ -1021,17 +1780,20 @@ def _normalize_prompt_category(assignment_category: str = "") -> str:
     return category if category in CATEGORY_PROMPT_ADDENDA else ""
 
 
-def _build_followup_chat_prompt(assignment_category: str = "") -> ChatPromptTemplate:
-    category = _normalize_prompt_category(assignment_category)
+@lru_cache(maxsize=None)
+def _followup_chat_system_message(category: str) -> SystemMessage:
+    """One system message per known category (plus the default); messages are never mutated."""
     system_prompt = SYSTEM_PROMPT_CHAT
     if category:
         system_prompt = f"{SYSTEM_PROMPT_CHAT}\n\n{CATEGORY_PROMPT_ADDENDA[category]}"
-    return ChatPromptTemplate.from_messages(
-        [
-            ("system", system_prompt),
-            ("human", HUMAN_TEMPLATE_CHAT),
-        ]
-    )
+    return SystemMessage(content=system_prompt)
+
+
+def _build_followup_chat_messages(assignment_category: str = "", **prompt_vars: str) -> list[BaseMessage]:
+    return [
+        _followup_chat_system_message(_normalize_prompt_category(assignment_category)),
+        HumanMessage(content=_build_chat_human_prompt(**prompt_vars)),
+    ]
 
 
 def stream_headstart_chat_answer(
@@ -1062,17 +1824,11 @@ def stream_headstart_chat_answer(
         MAX_OUTPUT_TOKENS,
     )
 
-    llm = build_nvidia_chat_client(
-        model_name=MODEL_NAME,
-        temperature=TEMPERATURE,
-        max_tokens=MAX_OUTPUT_TOKENS,
-        top_p=TOP_P,
-    )
-    prompt = _build_followup_chat_prompt(assignment_category)
+    llm = _get_llm()
 
     sanitized_payload = _sanitize_assignment_payload_for_chat(assignment_payload or {})
     payload_str = _truncate_for_chat(
-        json.dumps(sanitized_payload, ensure_ascii=False),
+        _dumps_json(sanitized_payload),
         MAX_CHAT_PAYLOAD_CHARS,
     )
     guide_markdown_str = _truncate_for_chat(
@@ -1102,7 +1858,7 @@ def stream_headstart_chat_answer(
         assignment_pdf_str = _truncate_for_chat(raw_pdf, MAX_CHAT_ASSIGNMENT_PDF_CHARS)
     else:
         assignment_pdf_str = (
-            "(assignment PDF content is available via the retrieved context snippets above)"
+            "(assignment PDF content is available via the retrieved context snippets below)"
         )
 
     user_attachments_str = _truncate_for_chat(
@@ -1122,7 +1878,8 @@ def stream_headstart_chat_answer(
         len(user_attachments_str),
     )
 
-    messages = prompt.format_messages(
+    messages = _build_followup_chat_messages(
+        assignment_category,
         payload=payload_str,
         guide_markdown=guide_markdown_str,
         retrieval_context=retrieval_context_str,
@@ -37,6 +37,10 @@ class RunAgentRequest(BaseModel):
     pdf_text: Optional[str] = ""
 
 
+class RunAgentBatchRequest(BaseModel):
+    runs: List[RunAgentRequest] = Field(min_length=1, max_length=20)
+
+
 class ChatHistoryMessage(BaseModel):
     role: str
     content: str
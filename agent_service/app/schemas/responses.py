@@ -20,6 +20,8 @@ Errors/Exceptions:
 - Pydantic validation errors when LLM output does not match schema.
 """
 
+from typing import List, Optional
+
 from pydantic import BaseModel, Field
 
 
@@ -29,6 +31,15 @@ class RunAgentResponse(BaseModel):
     )
 
 
+class RunAgentBatchItemResult(BaseModel):
+    guideMarkdown: Optional[str] = None
+    error: Optional[str] = None
+
+
+class RunAgentBatchResponse(BaseModel):
+    results: List[RunAgentBatchItemResult]
+
+
 class ChatCompletionResponse(BaseModel):
     assistantMessage: str = Field(
         description="Single markdown/plaintext assistant response for a follow-up chat question."
@@ -3,10 +3,10 @@ Artifact: agent_service/app/services/classification_service.py
 Purpose: Classifies assignments into broad follow-up chat prompt categories.
 """
 
-import json
 import re
 from typing import Any
 
+import orjson
 from langchain_core.messages import HumanMessage, SystemMessage
 
 from ..clients.llm_client import STRICT_GUIDE_MODEL_ID, build_nvidia_chat_client
@@ -20,6 +20,7 @@ CLASSIFIER_TOP_P = 1
 CLASSIFIER_MAX_TOKENS = 64
 MAX_CLASSIFICATION_PAYLOAD_CHARS = 5000
 MAX_CLASSIFICATION_PDF_CHARS = 5000
+CATEGORY_LABEL_RE = re.compile(r"\b(coding|mathematics|science|speech|essay|general)\b")
 
 CLASSIFICATION_SYSTEM_PROMPT = """\
 You classify Canvas assignments for an academic support application.
@@ -38,6 +39,8 @@ Use the best fit:
 Do not explain your choice. Do not output JSON.\
 """
 
+_CLASSIFICATION_SYSTEM_MSG = SystemMessage(content=CLASSIFICATION_SYSTEM_PROMPT)
+
 
 def _to_text(value: Any) -> str:
     if value is None:
@@ -63,7 +66,7 @@ def normalize_assignment_category(raw: str) -> str:
     text = (raw or "").strip().lower()
     if not text:
         return "general"
-    match = re.search(r"\b(coding|mathematics|science|speech|essay|general)\b", text)
+    match = CATEGORY_LABEL_RE.search(text)
     if not match:
         return "general"
     category = match.group(1)
@@ -79,7 +82,7 @@ def classify_assignment(payload: dict, pdf_text: str = "") -> str:
     """
     try:
         payload_str = _truncate(
-            json.dumps(payload or {}, ensure_ascii=False, default=str),
+            orjson.dumps(payload or {}, option=orjson.OPT_NON_STR_KEYS, default=str).decode("utf-8"),
             MAX_CLASSIFICATION_PAYLOAD_CHARS,
         )
         pdf_text_str = _truncate(pdf_text or "", MAX_CLASSIFICATION_PDF_CHARS)
@@ -91,7 +94,7 @@ def classify_assignment(payload: dict, pdf_text: str = "") -> str:
         )
         response = llm.invoke(
             [
-                SystemMessage(content=CLASSIFICATION_SYSTEM_PROMPT),
+                _CLASSIFICATION_SYSTEM_MSG,
                 HumanMessage(
                     content=(
                         "Assignment payload:\n"
@@ -9,9 +9,13 @@ Revised:
 
 from __future__ import annotations
 
+import contextvars
 import re
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Literal, Optional
 
+from pydantic import TypeAdapter, ValidationError
+
 from ..core.logging import get_logger
 from ..schemas.requests import RunAgentRequest
 from ..schemas.shared import (
@@ -23,6 +27,7 @@ from ..schemas.shared import (
 )
 from .pdf_text_service import (
     MAX_VISUAL_SIGNALS_PER_FILE,
+    PDF_FILE_WORKERS,
     _decode_pdf_base64,
     _download_pdf_from_storage_url,
     _merge_visual_signals,
@@ -37,6 +42,9 @@ logger = get_logger("headstart.main")
 PAGE_HEADER_RE = re.compile(r"^--- Page (\d+) \(([^)]+)\) ---$")
 NO_TEXT_SENTINEL = "(no text extracted)"
 
+# One validator/serializer for whole signal lists instead of a model call per signal.
+_VISUAL_SIGNALS_ADAPTER = TypeAdapter(list[PdfVisualSignal])
+
 
 def _parse_native_page_sections(native_text: str) -> list[tuple[int, str, str]]:
     pages: list[tuple[int, str, str]] = []
@@ -134,6 +142,11 @@ def _fallback_full_text_from_structured_text(native_text: str) -> str:
 
 
 def _to_visual_signal_models(signals: list[dict]) -> list[PdfVisualSignal]:
+    try:
+        return _VISUAL_SIGNALS_ADAPTER.validate_python(signals)
+    except ValidationError:
+        pass
+    # Slow path: drop only the malformed entries.
     out: list[PdfVisualSignal] = []
     for sig in signals:
         try:
@@ -211,6 +224,40 @@ def _load_pdf_bytes(pdf_file: Any) -> Optional[bytes]:
     return pdf_bytes
 
 
+def _extract_pdf_file(pdf_file: Any, source: str) -> Optional[PdfExtraction]:
+    """Load one attachment (download or base64 decode) and extract it."""
+    filename = getattr(pdf_file, "filename", "attachment.pdf")
+    pdf_bytes = _load_pdf_bytes(pdf_file)
+    if pdf_bytes is None:
+        logger.warning("Skipping %r: missing usable storage_url/base64_data input", filename)
+        return None
+
+    return extract_pdf_extraction_from_pdf_bytes(
+        pdf_bytes=pdf_bytes,
+        filename=filename,
+        source=source,
+        file_sha256=getattr(pdf_file, "file_sha256", None),
+    )
+
+
+def _extract_pdf_files(pdf_files: list[Any], source: str) -> list[Optional[PdfExtraction]]:
+    """
+    Extract attachments concurrently, preserving input order.
+
+    Downloads and VLM page calls overlap across files; PyMuPDF work itself is
+    serialized in-process (or fanned out to the page-scan process pool).
+    """
+    if len(pdf_files) <= 1 or PDF_FILE_WORKERS <= 1:
+        return [_extract_pdf_file(pdf_file, source) for pdf_file in pdf_files]
+
+    max_workers = min(len(pdf_files), PDF_FILE_WORKERS)
+    # Each file runs in its own copy of the caller's context so log records keep the request ID.
+    ctx = contextvars.copy_context()
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pdf-extract") as executor:
+        futures = [executor.submit(ctx.copy().run, _extract_pdf_file, pdf_file, source) for pdf_file in pdf_files]
+        return [future.result() for future in futures]
+
+
 def extract_pdf_extractions_with_file_map(
     req: RunAgentRequest,
 ) -> tuple[list[PdfExtraction], dict[str, PdfExtraction]]:
@@ -220,26 +267,22 @@ def extract_pdf_extractions_with_file_map(
         if ext.file_sha256:
             by_sha[ext.file_sha256] = ext
 
+    pending_files = []
+    pending_shas: set[str] = set()
     for pdf_file in req.pdf_files or []:
-        filename = getattr(pdf_file, "filename", "attachment.pdf")
         file_sha256 = getattr(pdf_file, "file_sha256", None)
-        if file_sha256 and file_sha256 in by_sha:
+        if file_sha256 and (file_sha256 in by_sha or file_sha256 in pending_shas):
             continue
+        if file_sha256:
+            pending_shas.add(file_sha256)
+        pending_files.append(pdf_file)
 
-        pdf_bytes = _load_pdf_bytes(pdf_file)
-        if pdf_bytes is None:
-            logger.warning("Skipping %r: missing usable storage_url/base64_data input", filename)
+    for extraction in _extract_pdf_files(pending_files, source="assignment"):
+        if extraction is None:
             continue
-
-        extraction = extract_pdf_extraction_from_pdf_bytes(
-            pdf_bytes=pdf_bytes,
-            filename=filename,
-            source="assignment",
-            file_sha256=file_sha256,
-        )
         extractions.append(extraction)
-        if file_sha256:
-            by_sha[file_sha256] = extraction
+        if extraction.file_sha256:
+            by_sha[extraction.file_sha256] = extraction
 
     # Last-resort backward compatibility for legacy inline text payloads.
     legacy_text = (req.pdf_text or "").strip()
@@ -276,24 +319,11 @@ def extract_pdf_extractions_from_pdf_files(
     pdf_files: list[Any],
     source: str,
 ) -> list[PdfExtraction]:
-    extractions: list[PdfExtraction] = []
-    for pdf_file in pdf_files or []:
-        filename = getattr(pdf_file, "filename", "attachment.pdf")
-        file_sha256 = getattr(pdf_file, "file_sha256", None)
-        pdf_bytes = _load_pdf_bytes(pdf_file)
-        if pdf_bytes is None:
-            logger.warning("Skipping %r: missing usable storage_url/base64_data input", filename)
-            continue
-
-        extractions.append(
-            extract_pdf_extraction_from_pdf_bytes(
-                pdf_bytes=pdf_bytes,
-                filename=filename,
-                source=source,
-                file_sha256=file_sha256,
-            )
-        )
-    return extractions
+    return [
+        extraction
+        for extraction in _extract_pdf_files(list(pdf_files or []), source=source)
+        if extraction is not None
+    ]
 
 
 def format_pdf_extractions_for_prompt(
@@ -316,13 +346,8 @@ def format_pdf_extractions_for_prompt(
 
 
 def collect_visual_signals_from_extractions(extractions: list[PdfExtraction]) -> list[dict]:
-    signals: list[dict] = []
-    for extraction in extractions or []:
-        for signal in extraction.visual_signals:
-            try:
-                signals.append(signal.model_dump())
-            except Exception:
-                continue
+    models = [signal for extraction in extractions or [] for signal in extraction.visual_signals]
+    signals: list[dict] = _VISUAL_SIGNALS_ADAPTER.dump_python(models) if models else []
     return _merge_visual_signals(signals, limit=MAX_VISUAL_SIGNALS_PER_FILE)
 
 
@@ -21,21 +21,31 @@ Errors/Exceptions:
 """
 
 import base64
+import contextvars
+import copy
+import hashlib
+import heapq
 import io
+import logging
 import math
+import multiprocessing
 import os
 import re
 import tempfile
+import threading
 import urllib.error
 import urllib.request
 import uuid
-from collections import Counter
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from functools import lru_cache
+from itertools import islice
 from typing import Any, Optional
 
-from ..core.logging import get_logger
+import pybase64
+
+from ..core.logging import configure_logging, get_logger, request_id_var
 from ..schemas.requests import RunAgentRequest
 
 logger = get_logger("headstart.main")
@@ -46,7 +56,9 @@ MIN_ALNUM_RATIO = 0.45
 MAX_SYMBOL_RATIO = 0.40
 
 VLM_DEFAULT_MODEL_ID = "meta/llama-3.2-90b-vision-instruct"
-VLM_RENDER_DPI = 240
+VLM_MIN_RENDER_DPI = 150
+# Scanned pages: an image covering at least this share of the page sets the render DPI.
+VLM_SCAN_IMAGE_MIN_COVERAGE = 0.5
 
 HEADER_FOOTER_SAMPLE_LINES = 2
 HEADER_FOOTER_REPEAT_RATIO = 0.60
@@ -55,6 +67,8 @@ HEADER_FOOTER_MIN_PAGES = 3
 MAX_VISUAL_SIGNALS_PER_FILE = 40
 MAX_VISUAL_SIGNAL_TEXT_LEN = 140
 MIN_RECT_WORD_OVERLAP = 0.20
+# Height (pt) of the horizontal bands used to index word boxes for annotation lookup.
+WORD_BAND_HEIGHT = 10.0
 MIN_USABLE_TEXT_SCORE = 0.28
 MIN_FALLBACK_NATIVE_SCORE = 0.12
 TEXT_SCORE_OCR_ADVANTAGE = 0.08
@@ -86,6 +100,23 @@ PDF_FETCH_MAX_BYTES = _env_int("PDF_FETCH_MAX_BYTES", 25 * 1024 * 1024)
 VLM_TIMEOUT_SECONDS = _env_float("VLM_TIMEOUT_SECONDS", 30.0)
 VLM_MAX_RETRIES = _env_int("VLM_MAX_RETRIES", 2)
 VLM_MAX_CONCURRENT_PAGES = _env_int("VLM_MAX_CONCURRENT_PAGES", 4)
+# Upper bound for page renders sent to the VLM; pixmap and upload size grow with DPI squared.
+VLM_RENDER_DPI = _env_int("VLM_RENDER_DPI", 200)
+
+# PyMuPDF is not thread-safe, so large documents are scanned in worker processes.
+PDF_PAGE_WORKERS = _env_int("PDF_PAGE_WORKERS", min(os.cpu_count() or 1, 4))
+# Each worker gets a pickled copy of the PDF and re-parses it; ranges must hold enough
+# pages for the scan to outweigh that copy, so short documents stay in process.
+PDF_MIN_PAGES_PER_WORKER = _env_int("PDF_MIN_PAGES_PER_WORKER", 16)
+PDF_FILE_WORKERS = _env_int("PDF_FILE_WORKERS", 4)
+
+# Serializes in-process PyMuPDF use when several files are extracted from threads.
+_PYMUPDF_LOCK = threading.Lock()
+
+# Extracted text/signals keyed by PDF content, so re-uploads of a spec skip re-parsing and VLM calls.
+PDF_CONTEXT_CACHE_MAX_ENTRIES = _env_int("PDF_CONTEXT_CACHE_MAX_ENTRIES", 32)
+_pdf_context_cache: "OrderedDict[tuple[bytes, str, bool], tuple[str, list[dict]]]" = OrderedDict()
+_pdf_context_cache_lock = threading.Lock()
 
 VLM_TEXT_EXTRACTION_PROMPT = (
     "You are a precise document text extraction system. "
@@ -108,7 +139,27 @@ SIGNAL_BASE_SCORES = {
     "colored_text": 0.35,
 }
 
-QUESTION_TOKEN_RE = re.compile(r"^(?:q(?:uestion)?\s*)?\d+[.)]?$", re.IGNORECASE)
+# Data-URL prefixes (`data:application/pdf;base64,`) sit in the first few dozen chars.
+DATA_URL_SCAN_CHARS = 64
+
+# One pass for both question cues: a bare marker ("Q3", "question 2)", "4.") or a
+# mention inside text ("see question 5"). `lastgroup` tells them apart.
+QUESTION_MARKER_RE = re.compile(
+    r"(?P<token>^(?:q(?:uestion)?\s*)?\d+[.)]?$)|(?P<mention>\bquestion\s+\d+\b)",
+    re.IGNORECASE,
+)
+DIGIT_RE = re.compile(r"\d")
+DIGIT_RUN_RE = re.compile(r"\d+")
+WHITESPACE_RUN_RE = re.compile(r"\s+")
+HORIZONTAL_SPACE_RUN_RE = re.compile(r"[ \t]+")
+ALNUM_TOKEN_RE = re.compile(r"[A-Za-z0-9]{2,}")
+BULLET_MARKERS = "-*\u2022"
+COLUMN_GAP_RE = re.compile(r"\S\s{2,}\S")
+HYPHENATED_LINE_BREAK_RE = re.compile(r"(?<=\w)-\n(?=\w)")
+
+# Byte classes for counting ASCII text in C; derived from str so they match the slow path.
+ASCII_WHITESPACE_BYTES = bytes(code for code in range(128) if chr(code).isspace())
+ASCII_NON_ALNUM_BYTES = bytes(code for code in range(128) if not chr(code).isalnum())
 
 
 @dataclass
@@ -125,7 +176,7 @@ def _visual_signals_enabled() -> bool:
 
 
 def _normalize_visual_text(text: str) -> str:
-    clean = re.sub(r"\s+", " ", (text or "")).strip()
+    clean = WHITESPACE_RUN_RE.sub(" ", (text or "")).strip()
     if len(clean) > MAX_VISUAL_SIGNAL_TEXT_LEN:
         clean = clean[: MAX_VISUAL_SIGNAL_TEXT_LEN - 1].rstrip() + "…"
     return clean
@@ -144,13 +195,14 @@ def _overlap_ratio(rect_a, rect_b) -> float:
 
 
 def _extract_words_for_page(page) -> list[dict]:
-    """Extract normalized word boxes for geometry-based annotation mapping."""
+    """Extract word boxes for geometry-based annotation mapping."""
     words = []
     for item in page.get_text("words") or []:
         if len(item) < 5:
             continue
         x0, y0, x1, y1, text = item[:5]
-        clean = _normalize_visual_text(text)
+        # Words are already whitespace-split; `_collect_text_in_rect` normalizes the joined selection.
+        clean = text.strip() if text else ""
         if not clean:
             continue
         words.append(
@@ -164,11 +216,42 @@ def _extract_words_for_page(page) -> list[dict]:
     return words
 
 
-def _collect_text_in_rect(page, rect, words: Optional[list[dict]] = None) -> str:
-    """Map a visual region to nearby words, falling back to get_textbox."""
+def _word_bands(y0: float, y1: float) -> range:
+    return range(int(y0 // WORD_BAND_HEIGHT), int(y1 // WORD_BAND_HEIGHT) + 1)
+
+
+def _index_words_by_band(words: list[dict]) -> dict[int, list[int]]:
+    """Map each horizontal band to the indices of words whose box spans it."""
+    bands: dict[int, list[int]] = {}
+    for index, word in enumerate(words):
+        rect = word["rect"]
+        for band in _word_bands(rect.y0, rect.y1):
+            bands.setdefault(band, []).append(index)
+    return bands
+
+
+def _collect_text_in_rect(
+    page,
+    rect,
+    words: Optional[list[dict]] = None,
+    word_bands: Optional[dict[int, list[int]]] = None,
+) -> str:
+    """
+    Map a visual region to nearby words, falling back to get_textbox.
+
+    With `word_bands`, only words sharing a band with `rect` are overlap-tested;
+    any word whose box intersects the rect vertically shares at least one band.
+    """
     words = words or []
+    if word_bands is not None:
+        indices = set()
+        for band in _word_bands(rect.y0, rect.y1):
+            indices.update(word_bands.get(band, ()))
+        candidates = [words[index] for index in sorted(indices)]
+    else:
+        candidates = words
     selected = []
-    for w in words:
+    for w in candidates:
         if _overlap_ratio(rect, w["rect"]) >= MIN_RECT_WORD_OVERLAP:
             selected.append(w)
     if selected:
@@ -185,12 +268,11 @@ def _score_visual_signal(text: str, signal_types: list[str]) -> float:
         score += 0.1 * (len(signal_types) - 1)
 
     s = (text or "").strip()
-    if QUESTION_TOKEN_RE.match(s):
-        score += 0.35
-    elif re.search(r"\bquestion\s+\d+\b", s, flags=re.IGNORECASE):
-        score += 0.25
+    question = QUESTION_MARKER_RE.search(s)
+    if question:
+        score += 0.35 if question.lastgroup == "token" else 0.25
 
-    if len(s) <= 12 and re.search(r"\d", s):
+    if len(s) <= 12 and DIGIT_RE.search(s):
         score += 0.15
     return round(min(score, 1.7), 3)
 
@@ -232,7 +314,7 @@ def _merge_visual_signals(signals: list[dict], limit: int) -> list[dict]:
         key = (
             sig.get("file"),
             sig.get("page"),
-            re.sub(r"\s+", " ", str(sig.get("text", "")).strip().lower()),
+            WHITESPACE_RUN_RE.sub(" ", str(sig.get("text", "")).strip().lower()),
         )
         existing = by_key.get(key)
         if not existing:
@@ -244,7 +326,8 @@ def _merge_visual_signals(signals: list[dict], limit: int) -> list[dict]:
         existing["significance"] = _significance_bucket(float(existing["score"]))
         existing["source"] = "annotation+style" if existing.get("source") != sig.get("source") else existing.get("source")
 
-    ranked = sorted(
+    return heapq.nsmallest(
+        limit,
         by_key.values(),
         key=lambda s: (
             -float(s.get("score", 0.0)),
@@ -252,15 +335,16 @@ def _merge_visual_signals(signals: list[dict], limit: int) -> list[dict]:
             str(s.get("text", "")),
         ),
     )
-    return ranked[:limit]
 
 
 def _extract_visual_signals_from_annotations(page, filename: str, page_number: int) -> list[dict]:
     signals = []
-    words = _extract_words_for_page(page)
-    annots = page.annots()
-    if not annots:
+    # page.annots() is a generator and always truthy; check the first annotation
+    # so pages without markup skip the word-box extraction entirely.
+    if page.first_annot is None:
         return signals
+    words = _extract_words_for_page(page)
+    word_bands = _index_words_by_band(words)
 
     type_map = {
         "highlight": "highlight",
@@ -268,13 +352,13 @@ def _extract_visual_signals_from_annotations(page, filename: str, page_number: i
         "strikeout": "strikeout",
         "squiggly": "squiggly",
     }
-    for annot in annots:
+    for annot in page.annots():
         try:
             annot_type = (annot.type[1] or "").strip().lower()
             mapped = type_map.get(annot_type)
             if not mapped:
                 continue
-            text = _collect_text_in_rect(page, annot.rect, words=words)
+            text = _collect_text_in_rect(page, annot.rect, words=words, word_bands=word_bands)
             signal = _build_signal(
                 filename=filename,
                 page_number=page_number,
@@ -326,9 +410,8 @@ def _extract_visual_signals_from_styles(page, filename: str, page_number: int) -
 
                 # Keep style-derived items focused on likely question markers / short emphasized tokens.
                 if not (
-                    QUESTION_TOKEN_RE.match(text)
-                    or re.search(r"\bquestion\s+\d+\b", text, flags=re.IGNORECASE)
-                    or (len(text) <= 24 and re.search(r"\d", text))
+                    QUESTION_MARKER_RE.search(text)
+                    or (len(text) <= 24 and DIGIT_RE.search(text))
                 ):
                     continue
 
@@ -344,13 +427,27 @@ def _extract_visual_signals_from_styles(page, filename: str, page_number: int) -
     return signals
 
 
+def _count_text_chars(text: str) -> tuple[int, int]:
+    """Return (non-space chars, alphanumeric chars)."""
+    if text.isascii():
+        compact = text.encode("ascii").translate(None, ASCII_WHITESPACE_BYTES)
+        return len(compact), len(compact.translate(None, ASCII_NON_ALNUM_BYTES))
+    chars = alnum = 0
+    for ch in text:
+        if ch.isspace():
+            continue
+        chars += 1
+        if ch.isalnum():
+            alnum += 1
+    return chars, alnum
+
+
 def _compute_text_quality(text: str) -> dict:
     """Return lightweight metrics used to decide native extraction quality."""
-    compact = "".join(ch for ch in (text or "") if not ch.isspace())
-    chars = len(compact)
-    alnum = sum(ch.isalnum() for ch in compact)
-    symbols = sum(not ch.isalnum() for ch in compact)
-    words = re.findall(r"[A-Za-z0-9]{2,}", text or "")
+    text = text or ""
+    chars, alnum = _count_text_chars(text)
+    symbols = chars - alnum
+    words = ALNUM_TOKEN_RE.findall(text)
     return {
         "chars": chars,
         "words": len(words),
@@ -361,6 +458,8 @@ def _compute_text_quality(text: str) -> dict:
 
 def _score_text_quality(text: str) -> float:
     """Map text-quality metrics to a simple 0-1 score for native vs OCR selection."""
+    if not text:
+        return 0.0
     metrics = _compute_text_quality(text)
     if metrics["chars"] == 0:
         return 0.0
@@ -373,23 +472,30 @@ def _score_text_quality(text: str) -> float:
 
 
 def _should_ocr_page(native_text: str) -> bool:
-    """Decide if a page should use OCR instead of native extraction."""
-    metrics = _compute_text_quality(native_text)
-    if metrics["chars"] < MIN_NATIVE_TEXT_CHARS:
+    """
+    Decide if a page should use OCR instead of native extraction.
+
+    Same thresholds as `_compute_text_quality`, checked cheapest first; the word
+    scan stops as soon as MIN_NATIVE_WORDS tokens are seen.
+    """
+    native_text = native_text or ""
+    if len(native_text) < MIN_NATIVE_TEXT_CHARS:
         return True
-    if metrics["words"] < MIN_NATIVE_WORDS:
+    chars, alnum = _count_text_chars(native_text)
+    if chars < MIN_NATIVE_TEXT_CHARS:
         return True
-    if metrics["alnum_ratio"] < MIN_ALNUM_RATIO:
+    if alnum / chars < MIN_ALNUM_RATIO:
         return True
-    if metrics["symbol_ratio"] > MAX_SYMBOL_RATIO:
+    if (chars - alnum) / chars > MAX_SYMBOL_RATIO:
         return True
-    return False
+    words = sum(1 for _ in islice(ALNUM_TOKEN_RE.finditer(native_text), MIN_NATIVE_WORDS))
+    return words < MIN_NATIVE_WORDS
 
 
 def _normalize_match_line(line: str) -> str:
     """Normalize line signatures for repeated header/footer detection."""
-    normalized = re.sub(r"\d+", "#", (line or "").lower())
-    normalized = re.sub(r"\s+", " ", normalized).strip(" .:-|_")
+    normalized = DIGIT_RUN_RE.sub("#", (line or "").lower())
+    normalized = WHITESPACE_RUN_RE.sub(" ", normalized).strip(" .:-|_")
     return normalized
 
 
@@ -403,14 +509,25 @@ def _remove_repeated_headers_and_footers(page_texts: list[str]) -> list[str]:
         return page_texts
 
     pattern_counts: Counter = Counter()
-
-    for text in page_texts:
-        lines = [ln.strip() for ln in (text or "").splitlines() if ln.strip()]
+    # Split each page once; the cleanup pass below walks the same line lists.
+    page_lines = [(text or "").splitlines() for text in page_texts]
+    # Headers/footers repeat verbatim and sampled lines are seen again in the cleanup
+    # pass, so normalize each distinct line once.
+    normalized_lines: dict[str, str] = {}
+
+    def normalize(line: str) -> str:
+        normalized = normalized_lines.get(line)
+        if normalized is None:
+            normalized = normalized_lines[line] = _normalize_match_line(line)
+        return normalized
+
+    for raw_lines in page_lines:
+        lines = [stripped for stripped in map(str.strip, raw_lines) if stripped]
         sampled = lines[:HEADER_FOOTER_SAMPLE_LINES] + lines[-HEADER_FOOTER_SAMPLE_LINES:]
         patterns = {
-            _normalize_match_line(ln)
+            normalize(ln)
             for ln in sampled
-            if 4 <= len(ln.strip()) <= 140
+            if 4 <= len(ln) <= 140
         }
         for pattern in patterns:
             if pattern:
@@ -424,33 +541,48 @@ def _remove_repeated_headers_and_footers(page_texts: list[str]) -> list[str]:
         return page_texts
 
     cleaned_pages = []
-    for text in page_texts:
+    for raw_lines in page_lines:
         kept_lines = []
-        for line in (text or "").splitlines():
-            if _normalize_match_line(line) in repeated_patterns:
+        for line in raw_lines:
+            if normalize(line) in repeated_patterns:
                 continue
             kept_lines.append(line.rstrip())
         cleaned_pages.append("\n".join(kept_lines).strip())
     return cleaned_pages
 
 
+def _starts_with_numbered_marker(s: str) -> bool:
+    """Return True for numbered-list prefixes such as "12. " or "3) " (digits, `.`/`)`, whitespace)."""
+    end = 0
+    length = len(s)
+    while end < length and s[end].isdecimal():
+        end += 1
+    return 0 < end < length - 1 and s[end] in ".)" and s[end + 1].isspace()
+
+
 def _looks_like_structural_line(line: str) -> bool:
     """Preserve line breaks for headings, bullets, numbered lists, and table-ish rows."""
     s = (line or "").strip()
     if not s:
         return False
-    if re.match(r"^[-*\u2022]\s+", s):
+    first = s[0]
+    if first in BULLET_MARKERS and s[1:2].isspace():
         return True
-    if re.match(r"^\d+[.)]\s+", s):
+    if first.isdecimal() and _starts_with_numbered_marker(s):
         return True
     if s.endswith(":") and len(s) <= 90:
         return True
     if "|" in s:
         return True
-    if re.search(r"\S\s{2,}\S", s):
+    # `s` is stripped, so any double space sits between non-space characters.
+    if "  " in s:
         return True
     if s.isupper() and 3 <= len(s) <= 80:
         return True
+    # Printable ASCII has no whitespace besides " ", so only other text needs the
+    # regex to find gaps made of tabs or Unicode spaces.
+    if not (s.isascii() and s.isprintable()) and COLUMN_GAP_RE.search(s):
+        return True
     return False
 
 
@@ -484,34 +616,29 @@ def _unwrap_hard_line_breaks(text: str) -> str:
     if paragraph_buffer:
         out_lines.append(" ".join(paragraph_buffer))
 
-    normalized = []
-    prev_blank = False
-    for line in out_lines:
-        if not line:
-            if not prev_blank:
-                normalized.append("")
-            prev_blank = True
-            continue
-        normalized.append(re.sub(r"[ \t]+", " ", line).strip())
-        prev_blank = False
-
-    return "\n".join(normalized).strip()
+    # Blank runs are already collapsed above and every piece was stripped, so one
+    # substitution over the joined page replaces a per-line normalization pass.
+    return HORIZONTAL_SPACE_RUN_RE.sub(" ", "\n".join(out_lines)).strip()
 
 
 def _normalize_page_text(text: str) -> str:
     """Normalize extracted page text for better LLM readability and chunk stability."""
     if not text:
         return ""
-    normalized = text.replace("\r\n", "\n").replace("\r", "\n").replace("\u00a0", " ")
+    normalized = text
+    # PyMuPDF emits "\n" line ends; only CR-bearing text (e.g. VLM output) needs both passes.
+    if "\r" in normalized:
+        normalized = normalized.replace("\r\n", "\n").replace("\r", "\n")
+    normalized = normalized.replace("\u00a0", " ")
     # Fix words broken by PDF line wrapping, e.g. "multi-\nline".
-    normalized = re.sub(r"(?<=\w)-\n(?=\w)", "", normalized)
+    normalized = HYPHENATED_LINE_BREAK_RE.sub("", normalized)
     normalized = _unwrap_hard_line_breaks(normalized)
     return normalized.strip()
 
 
 def _text_token_overlap_ratio(left: str, right: str) -> float:
-    left_tokens = set(re.findall(r"[A-Za-z0-9]{2,}", (left or "").lower()))
-    right_tokens = set(re.findall(r"[A-Za-z0-9]{2,}", (right or "").lower()))
+    left_tokens = set(ALNUM_TOKEN_RE.findall((left or "").lower()))
+    right_tokens = set(ALNUM_TOKEN_RE.findall((right or "").lower()))
     if not left_tokens or not right_tokens:
         return 0.0
     return len(left_tokens & right_tokens) / min(len(left_tokens), len(right_tokens))
@@ -593,14 +720,46 @@ def _build_vlm_client():
     )
 
 
+def _vlm_render_dpi(page) -> int:
+    """
+    Match the render DPI to a full-page scan's own resolution, clamped to
+    [VLM_MIN_RENDER_DPI, VLM_RENDER_DPI]. Rendering above the source adds pixels
+    (DPI squared) without detail; pages without a dominant image keep the default.
+    """
+    page_rect = page.rect
+    page_area = page_rect.width * page_rect.height
+    if page_area <= 0:
+        return VLM_RENDER_DPI
+
+    source_dpi = 0.0
+    for info in page.get_image_info():
+        x0, y0, x1, y1 = info["bbox"]
+        shown_width = x1 - x0
+        if shown_width <= 0 or shown_width * (y1 - y0) < page_area * VLM_SCAN_IMAGE_MIN_COVERAGE:
+            continue
+        source_dpi = max(source_dpi, info["width"] / shown_width * 72.0)
+
+    if not source_dpi:
+        return VLM_RENDER_DPI
+    return min(VLM_RENDER_DPI, max(VLM_MIN_RENDER_DPI, int(source_dpi)))
+
+
 def _render_page_to_png(page) -> bytes:
-    """Render a PyMuPDF page to preprocessed PNG bytes. Must be called from the main thread."""
+    """
+    Render a PyMuPDF page to preprocessed PNG bytes.
+
+    PyMuPDF objects must not be shared across threads: call this with `_PYMUPDF_LOCK`
+    held, or inside a page-scan worker process that owns its document.
+    """
+    import fitz
     from PIL import ImageOps
     from PIL import Image
 
-    pix = page.get_pixmap(dpi=VLM_RENDER_DPI, alpha=False)
-    image = Image.open(io.BytesIO(pix.tobytes("png")))
-    processed = ImageOps.autocontrast(image.convert("L"))
+    # Render straight to 8-bit grayscale and wrap the raw samples: no PNG encode/decode
+    # round trip and no RGB -> L conversion before autocontrast.
+    pix = page.get_pixmap(dpi=_vlm_render_dpi(page), colorspace=fitz.csGRAY, alpha=False)
+    image = Image.frombytes("L", (pix.width, pix.height), pix.samples)
+    processed = ImageOps.autocontrast(image)
     buf = io.BytesIO()
     processed.save(buf, format="PNG")
     return buf.getvalue()
@@ -654,6 +813,120 @@ def _extract_vlm_text_from_png(png_bytes: bytes, filename: str, page_number: int
     return normalized, "success"
 
 
+def _scan_page_range(
+    doc,
+    filename: str,
+    start: int,
+    stop: int,
+    collect_visual: bool,
+) -> tuple[list[tuple[int, str, bool, bytes]], list[dict]]:
+    """
+    Extract native text, decide which pages need VLM, and pre-render those pages
+    to PNG bytes for the 0-based page range [start, stop) of an open document.
+    """
+    page_data: list[tuple[int, str, bool, bytes]] = []
+    visual_signals: list[dict] = []
+    for page_index in range(start, stop):
+        page = doc[page_index]
+        idx = page_index + 1
+        native_text = page.get_text("text") or ""
+        needs_vlm = _should_ocr_page(native_text)
+        png_bytes_for_page = b""
+        if needs_vlm:
+            try:
+                png_bytes_for_page = _render_page_to_png(page)
+            except Exception as render_exc:
+                logger.warning(
+                    "Page render failed for %r page %d: %s",
+                    filename,
+                    idx,
+                    render_exc,
+                )
+        page_data.append((idx, native_text, needs_vlm, png_bytes_for_page))
+
+        if collect_visual:
+            visual_signals.extend(_extract_visual_signals_from_annotations(page, filename, idx))
+            visual_signals.extend(_extract_visual_signals_from_styles(page, filename, idx))
+    return page_data, visual_signals
+
+
+def _scan_page_range_from_bytes(
+    pdf_bytes: bytes,
+    filename: str,
+    start: int,
+    stop: int,
+    collect_visual: bool,
+    request_id: str = "-",
+) -> tuple[list[tuple[int, str, bool, bytes]], list[dict]]:
+    """Process-pool entry point: each worker opens its own document handle."""
+    import fitz
+
+    request_id_var.set(request_id)
+
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        return _scan_page_range(doc, filename, start, stop, collect_visual)
+
+
+@lru_cache(maxsize=1)
+def _get_page_scan_executor() -> ProcessPoolExecutor:
+    """Shared page-scan pool; spawned workers avoid forking a threaded server."""
+    return ProcessPoolExecutor(
+        max_workers=PDF_PAGE_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=configure_logging,
+    )
+
+
+def shutdown_page_scan_executor() -> None:
+    """Stop page-scan worker processes if the pool was started."""
+    if _get_page_scan_executor.cache_info().currsize:
+        _get_page_scan_executor().shutdown(wait=True, cancel_futures=True)
+        _get_page_scan_executor.cache_clear()
+
+
+def _page_scan_range_count(page_count: int) -> int:
+    """Number of page ranges to scan; `1` keeps the scan in process."""
+    if PDF_PAGE_WORKERS <= 1:
+        return 1
+    return max(1, min(PDF_PAGE_WORKERS, page_count // max(PDF_MIN_PAGES_PER_WORKER, 1)))
+
+
+def _scan_pages_in_parallel(
+    doc,
+    pdf_bytes: bytes,
+    filename: str,
+    page_count: int,
+    range_count: int,
+    collect_visual: bool,
+) -> tuple[list[tuple[int, str, bool, bytes]], list[dict]]:
+    """
+    Split the document into contiguous page ranges and scan them in worker processes.
+
+    The first range is scanned here on the caller's already-open `doc` while the
+    workers run, so it is neither re-parsed nor shipped to another process.
+    """
+    chunk_size = math.ceil(page_count / range_count)
+    ranges = [(start, min(start + chunk_size, page_count)) for start in range(0, page_count, chunk_size)]
+    executor = _get_page_scan_executor()
+    request_id = request_id_var.get()
+    futures = [
+        executor.submit(
+            _scan_page_range_from_bytes, pdf_bytes, filename, start, stop, collect_visual, request_id
+        )
+        for start, stop in ranges[1:]
+    ]
+
+    first_start, first_stop = ranges[0]
+    with _PYMUPDF_LOCK:
+        page_data, visual_signals = _scan_page_range(doc, filename, first_start, first_stop, collect_visual)
+    # Wait for the workers without the lock so other files' scans keep running.
+    for future in futures:
+        range_pages, range_signals = future.result()
+        page_data.extend(range_pages)
+        visual_signals.extend(range_signals)
+    return page_data, visual_signals
+
+
 def _extract_pages_and_visual_signals(pdf_bytes: bytes, filename: str) -> tuple[list[ExtractedPage], list[dict]]:
     """Extract per-page text and optional visual-emphasis signals."""
     try:
@@ -665,33 +938,37 @@ def _extract_pages_and_visual_signals(pdf_bytes: bytes, filename: str) -> tuple[
         return [], []
 
     pages: list[ExtractedPage] = []
-    visual_signals: list[dict] = []
     collect_visual = _visual_signals_enabled()
 
     try:
-        with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
-            # Phase 1 (main thread): extract native text, decide which pages need VLM,
-            # and pre-render those pages to PNG bytes while the doc is still open.
-            page_data: list[tuple[int, str, bool, bytes]] = []
-            for idx, page in enumerate(doc, start=1):
-                native_text = page.get_text("text") or ""
-                needs_vlm = _should_ocr_page(native_text)
-                png_bytes_for_page = b""
-                if needs_vlm:
-                    try:
-                        png_bytes_for_page = _render_page_to_png(page)
-                    except Exception as render_exc:
-                        logger.warning(
-                            "Page render failed for %r page %d: %s",
-                            filename,
-                            idx,
-                            render_exc,
-                        )
-                page_data.append((idx, native_text, needs_vlm, png_bytes_for_page))
-
-                if collect_visual:
-                    visual_signals.extend(_extract_visual_signals_from_annotations(page, filename, idx))
-                    visual_signals.extend(_extract_visual_signals_from_styles(page, filename, idx))
+        # Phase 1: extract native text, decide which pages need VLM, and pre-render
+        # those pages to PNG bytes. Large documents fan out across worker processes.
+        # The module lock covers in-process PyMuPDF calls only, never waits on workers.
+        page_data: Optional[list[tuple[int, str, bool, bytes]]] = None
+        with _PYMUPDF_LOCK:
+            doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+            page_count = doc.page_count
+        try:
+            range_count = _page_scan_range_count(page_count)
+            if range_count > 1:
+                try:
+                    page_data, visual_signals = _scan_pages_in_parallel(
+                        doc, pdf_bytes, filename, page_count, range_count, collect_visual
+                    )
+                except Exception as pool_exc:
+                    logger.warning(
+                        "Parallel page scan failed for %r, scanning serially: %s",
+                        filename,
+                        pool_exc,
+                    )
+            if page_data is None:
+                with _PYMUPDF_LOCK:
+                    page_data, visual_signals = _scan_page_range(
+                        doc, filename, 0, page_count, collect_visual
+                    )
+        finally:
+            with _PYMUPDF_LOCK:
+                doc.close()
 
         # Phase 2 (thread pool): submit VLM calls in parallel for pages that need it.
         vlm_results: dict[int, tuple[str, str]] = {}
@@ -699,9 +976,10 @@ def _extract_pages_and_visual_signals(pdf_bytes: bytes, filename: str) -> tuple[
 
         if vlm_tasks:
             max_workers = min(len(vlm_tasks), VLM_MAX_CONCURRENT_PAGES)
+            ctx = contextvars.copy_context()
             with ThreadPoolExecutor(max_workers=max_workers) as executor:
                 future_to_idx = {
-                    executor.submit(_extract_vlm_text_from_png, png, filename, idx): idx
+                    executor.submit(ctx.copy().run, _extract_vlm_text_from_png, png, filename, idx): idx
                     for idx, png in vlm_tasks
                 }
                 for future in as_completed(future_to_idx):
@@ -729,16 +1007,18 @@ def _extract_pages_and_visual_signals(pdf_bytes: bytes, filename: str) -> tuple[
                     text=page_text,
                 )
             )
-            logger.debug(
-                "Page extraction %r page %d | method=%s | vlm_candidate=%s | vlm_status=%s | native_score=%.3f | vlm_score=%.3f",
-                filename,
-                idx,
-                method,
-                needs_vlm,
-                vlm_status,
-                _score_text_quality(_normalize_page_text(native_text)),
-                _score_text_quality(vlm_text),
-            )
+            # The quality scores re-normalize and re-score page text; only compute them for DEBUG.
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Page extraction %r page %d | method=%s | vlm_candidate=%s | vlm_status=%s | native_score=%.3f | vlm_score=%.3f",
+                    filename,
+                    idx,
+                    method,
+                    needs_vlm,
+                    vlm_status,
+                    _score_text_quality(_normalize_page_text(native_text)),
+                    _score_text_quality(vlm_text),
+                )
 
         visual_signals = _merge_visual_signals(visual_signals, limit=MAX_VISUAL_SIGNALS_PER_FILE)
         return pages, visual_signals
@@ -753,8 +1033,43 @@ def _extract_pages(pdf_bytes: bytes, filename: str) -> list[ExtractedPage]:
     return pages
 
 
+def _pdf_context_cache_key(pdf_bytes: bytes, filename: str) -> tuple[bytes, str, bool]:
+    # Signals carry the filename, and the visual toggle changes the result.
+    digest = hashlib.blake2b(pdf_bytes, digest_size=16).digest()
+    return digest, filename, _visual_signals_enabled()
+
+
+def _lookup_pdf_context(key: tuple[bytes, str, bool]) -> Optional[tuple[str, list[dict]]]:
+    with _pdf_context_cache_lock:
+        entry = _pdf_context_cache.get(key)
+        if entry is None:
+            return None
+        _pdf_context_cache.move_to_end(key)
+    output, visual_signals = entry
+    return output, copy.deepcopy(visual_signals)
+
+
+def _store_pdf_context(key: tuple[bytes, str, bool], output: str, visual_signals: list[dict]) -> None:
+    with _pdf_context_cache_lock:
+        _pdf_context_cache[key] = (output, copy.deepcopy(visual_signals))
+        _pdf_context_cache.move_to_end(key)
+        while len(_pdf_context_cache) > PDF_CONTEXT_CACHE_MAX_ENTRIES:
+            _pdf_context_cache.popitem(last=False)
+
+
+def _clear_pdf_context_cache() -> None:
+    with _pdf_context_cache_lock:
+        _pdf_context_cache.clear()
+
+
 def extract_pdf_context_from_pdf_bytes(pdf_bytes: bytes, filename: str) -> tuple[str, list[dict]]:
     """Extract normalized text plus ranked visual-emphasis signals from one PDF."""
+    cache_key = _pdf_context_cache_key(pdf_bytes, filename)
+    cached = _lookup_pdf_context(cache_key)
+    if cached is not None:
+        logger.info("Reusing extracted text for PDF %r (content cache hit)", filename)
+        return cached
+
     pages, visual_signals = _extract_pages_and_visual_signals(pdf_bytes=pdf_bytes, filename=filename)
     if not pages:
         return "", []
@@ -776,6 +1091,9 @@ def extract_pdf_context_from_pdf_bytes(pdf_bytes: bytes, filename: str) -> tuple
         len(pages),
         len(visual_signals),
     )
+    # Pages without any text may be transient VLM failures; leave those to be retried.
+    if all(page.method != "none" for page in pages):
+        _store_pdf_context(cache_key, output, visual_signals)
     return output, visual_signals
 
 
@@ -786,11 +1104,24 @@ def extract_text_from_pdf_bytes(pdf_bytes: bytes, filename: str) -> str:
 
 
 def _decode_pdf_base64(base64_data: str) -> bytes:
-    """Decode raw base64 or data-URL style PDF payloads."""
-    data = base64_data.strip()
-    if "," in data and data.lower().startswith("data:"):
-        data = data.split(",", 1)[1]
-    return base64.b64decode(data)
+    """
+    Decode raw base64 or data-URL style PDF payloads.
+
+    Decoders read ASCII strings in place and skip surrounding whitespace
+    themselves, so multi-MB payloads are not stripped, split, or ASCII-encoded
+    into intermediate copies first. `pybase64`'s strict (SIMD) mode is fastest,
+    so line-wrapped payloads retry non-strictly.
+    """
+    data = base64_data
+    head = data[:DATA_URL_SCAN_CHARS].lstrip()
+    if head[:5].lower() == "data:":
+        comma = data.find(",")
+        if comma != -1:
+            data = data[comma + 1 :]
+    try:
+        return pybase64.b64decode(data, validate=True)
+    except ValueError:
+        return pybase64.b64decode(data)
 
 
 def _download_pdf_from_storage_url(storage_url: str, filename: str) -> Optional[bytes]:
@@ -864,17 +1195,33 @@ def _pdf_debug_dump_enabled() -> bool:
     return raw in {"1", "true", "yes", "on"}
 
 
+@lru_cache(maxsize=1)
+def _get_pdf_dump_executor() -> ThreadPoolExecutor:
+    """Single writer thread so debug dumps never block the request path."""
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="pdf-debug-dump")
+
+
 def _maybe_dump_pdf_text(parts: list[str]) -> None:
     if not parts or not _pdf_debug_dump_enabled():
         return
 
     dump_dir = (os.getenv("PDF_DEBUG_DUMP_DIR") or tempfile.gettempdir()).strip()
+    # Run in a copy of the caller's context so the "dumped" log line keeps its request ID.
+    ctx = contextvars.copy_context()
+    _get_pdf_dump_executor().submit(ctx.run, _write_pdf_text_dump, dump_dir, tuple(parts))
+
+
+def _write_pdf_text_dump(dump_dir: str, parts: tuple[str, ...]) -> None:
     try:
         os.makedirs(dump_dir, exist_ok=True)
         dump_filename = f"headstart-pdf-extracted-{os.getpid()}-{uuid.uuid4().hex[:12]}.txt"
         dump_path = os.path.join(dump_dir, dump_filename)
         with open(dump_path, "w", encoding="utf-8") as f:
-            f.write("\n\n\n".join(parts))
+            # Stream parts to disk instead of materializing one joined copy.
+            for index, part in enumerate(parts):
+                if index:
+                    f.write("\n\n\n")
+                f.write(part)
         logger.info("PDF text dumped to %s", dump_path)
     except Exception as e:
         logger.warning("Failed to write PDF debug dump to %r: %s", dump_dir, e)
@@ -949,7 +1296,8 @@ def extract_pdf_context_with_file_texts(
 
         text, file_signals = extract_pdf_context_from_pdf_bytes(pdf_bytes, pdf_file.filename)
         if text:
-            logger.info("PDF %r preview: %r", pdf_file.filename, text[:200])
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("PDF %r preview: %r", pdf_file.filename, text[:200])
             parts.append(format_attachment_block(pdf_file.filename, "assignment", text))
             if pdf_file.file_sha256:
                 file_texts_by_sha256[pdf_file.file_sha256] = text
@@ -19,16 +19,24 @@ Errors/Exceptions:
 - Propagates orchestration/runtime exceptions to API layer for HTTP error mapping.
 """
 
+import asyncio
 import math
-import json
 import uuid
 from difflib import SequenceMatcher
 from typing import Generator
 
+import orjson
+
+from ..core.concurrency import run_in_workflow_executor
 from ..core.logging import get_logger
-from ..schemas.requests import ChatStreamRequest, RunAgentRequest
+from ..schemas.requests import ChatStreamRequest, RunAgentBatchRequest, RunAgentRequest
 from ..schemas.rag import RetrievedChunk
-from ..schemas.responses import ChatCompletionResponse, RunAgentResponse
+from ..schemas.responses import (
+    ChatCompletionResponse,
+    RunAgentBatchItemResult,
+    RunAgentBatchResponse,
+    RunAgentResponse,
+)
 from ..schemas.shared import PdfExtraction, PdfExtractionQuality, PdfPageExtraction
 from .image_extraction_service import extract_images_deduped
 from .pdf_extraction_service import (
@@ -52,6 +60,13 @@ def _run_headstart_agent(payload: dict, pdf_text: str, visual_signals: list[dict
     return run_headstart_agent(payload, pdf_text, visual_signals=visual_signals)
 
 
+async def _run_headstart_agents(items: list[tuple[dict, str, list[dict]]]) -> list:
+    """Lazy import to avoid loading LLM dependencies at module import time."""
+    from ..orchestrators.headstart_orchestrator import run_headstart_agents
+
+    return await run_headstart_agents(items, return_exceptions=True)
+
+
 def _stream_headstart_agent_markdown(
     payload: dict,
     pdf_text: str,
@@ -130,6 +145,49 @@ def run_agent_workflow(req: RunAgentRequest, route_path: str) -> dict:
     return result
 
 
+def _prepare_run_inputs(req: RunAgentRequest) -> tuple[dict, str, list[dict]]:
+    pdf_extractions, _ = extract_pdf_extractions_with_file_map(req)
+    pdf_text = format_pdf_extractions_for_prompt(pdf_extractions, source="assignment")
+    visual_signals = collect_visual_signals_from_extractions(pdf_extractions)
+    return req.payload, pdf_text, visual_signals
+
+
+async def run_agent_batch_workflow(req: RunAgentBatchRequest, route_path: str) -> RunAgentBatchResponse:
+    """
+    Execute several independent run-agent requests with concurrent LLM calls.
+
+    PDF extraction runs on the workflow executor; guide generation is submitted
+    through the orchestrator's async batch path. Per-run failures are reported
+    in place instead of failing the whole batch.
+    """
+    logger.info("POST %s | runs=%d", route_path, len(req.runs))
+
+    outcomes = await asyncio.gather(
+        *(run_in_workflow_executor(_prepare_run_inputs, run) for run in req.runs),
+        return_exceptions=True,
+    )
+    prepared = [(index, item) for index, item in enumerate(outcomes) if not isinstance(item, BaseException)]
+    if prepared:
+        generated = await _run_headstart_agents([item for _, item in prepared])
+        for (index, _), outcome in zip(prepared, generated):
+            outcomes[index] = outcome
+
+    results = []
+    for index, outcome in enumerate(outcomes):
+        if isinstance(outcome, BaseException):
+            logger.error("Batch run %d failed: %r", index, outcome)
+            results.append(RunAgentBatchItemResult(error=str(outcome)))
+        else:
+            results.append(RunAgentBatchItemResult(guideMarkdown=outcome.get("guideMarkdown")))
+
+    logger.info(
+        "Batch completed | runs=%d failed=%d",
+        len(results),
+        sum(1 for item in results if item.error is not None),
+    )
+    return RunAgentBatchResponse(results=results)
+
+
 def _build_event(event: str, data: dict) -> dict:
     return {
         "event": event,
@@ -144,7 +202,7 @@ def _normalize_markdown_output(text: str) -> str:
 
     if cleaned.startswith("{") and '"guideMarkdown"' in cleaned:
         try:
-            parsed = json.loads(cleaned)
+            parsed = orjson.loads(cleaned)
             guide_markdown = parsed.get("guideMarkdown")
             if isinstance(guide_markdown, str):
                 cleaned = guide_markdown.strip()
@@ -2,7 +2,7 @@ import unittest
 
 from app.orchestrators.headstart_orchestrator import (
     CATEGORY_PROMPT_ADDENDA,
-    _build_followup_chat_prompt,
+    _build_followup_chat_messages,
 )
 
 
@@ -19,12 +19,19 @@ PROMPT_VARS = {
 
 
 def system_prompt_text(category: str = "") -> str:
-    prompt = _build_followup_chat_prompt(category)
-    messages = prompt.format_messages(**PROMPT_VARS)
+    messages = _build_followup_chat_messages(category, **PROMPT_VARS)
     return str(messages[0].content)
 
 
 class TestHeadstartOrchestratorCategoryPrompts(unittest.TestCase):
+    def test_system_prompt_keeps_literal_calendar_json_example(self):
+        self.assertIn('{"sessions":[{"start_iso"', system_prompt_text(""))
+
+    def test_human_message_fills_every_prompt_variable(self):
+        human = str(_build_followup_chat_messages("", **PROMPT_VARS)[1].content)
+        self.assertIn("What next?", human)
+        self.assertNotIn("{user_message}", human)
+
     def test_empty_category_uses_base_prompt(self):
         base_text = system_prompt_text("")
         self.assertEqual(system_prompt_text("general"), base_text)
@@ -0,0 +1,101 @@
+import unittest
+from unittest.mock import patch
+
+from app.orchestrators.headstart_orchestrator import (
+    _extract_json_span,
+    _maybe_unwrap_text_dict,
+    _repair_json,
+    _strip_markdown_fences,
+    _try_parse_json,
+)
+
+
+class TestHeadstartOrchestratorJsonParsing(unittest.TestCase):
+    def test_parses_strict_json_inside_fences(self):
+        text = '```json\n{"guideMarkdown": "## Overview"}\n```'
+        self.assertEqual(_try_parse_json(text), {"guideMarkdown": "## Overview"})
+
+    def test_well_formed_json_skips_span_extraction_and_repair(self):
+        text = '  {"guideMarkdown": "## Overview"}\n'
+        with patch(
+            "app.orchestrators.headstart_orchestrator._extract_json_span"
+        ) as mock_span, patch("app.orchestrators.headstart_orchestrator._repair_json") as mock_repair:
+            self.assertEqual(_try_parse_json(text), {"guideMarkdown": "## Overview"})
+        mock_span.assert_not_called()
+        mock_repair.assert_not_called()
+
+    def test_top_level_array_falls_through_to_object_extraction(self):
+        self.assertEqual(_try_parse_json('[{"guideMarkdown": "x"}]'), {"guideMarkdown": "x"})
+
+    def test_repairs_single_quotes_bare_keys_and_trailing_commas(self):
+        text = "{guideMarkdown: 'Read the rubric', 'extra': [1, 2,],}"
+        self.assertEqual(
+            _try_parse_json(text),
+            {"guideMarkdown": "Read the rubric", "extra": [1, 2]},
+        )
+
+    def test_repair_preserves_apostrophes_inside_double_quoted_strings(self):
+        repaired = _repair_json('{"guideMarkdown": "Don\'t skip it",}')
+        self.assertEqual(repaired, '{"guideMarkdown": "Don\'t skip it"}')
+
+    def test_repair_escapes_raw_newlines_inside_strings(self):
+        text = '{"guideMarkdown": "## Overview\n\n- Step one"}'
+        self.assertEqual(
+            _try_parse_json(text),
+            {"guideMarkdown": "## Overview\n\n- Step one"},
+        )
+
+    def test_repair_converts_smart_quoted_strings(self):
+        text = "{“guideMarkdown”: “Start early”}"
+        self.assertEqual(_try_parse_json(text), {"guideMarkdown": "Start early"})
+
+    def test_extract_json_span_ignores_braces_inside_strings_and_trailing_text(self):
+        text = 'Sure: {"guideMarkdown": "use {x} and \\"}\\""} and later {"other": 1}'
+        self.assertEqual(
+            _extract_json_span(text),
+            '{"guideMarkdown": "use {x} and \\"}\\""}',
+        )
+
+    def test_parses_object_followed_by_commentary(self):
+        text = '{"guideMarkdown": "## Overview"}\nHope this helps! {not json}'
+        self.assertEqual(_try_parse_json(text), {"guideMarkdown": "## Overview"})
+
+    def test_object_with_trailing_text_skips_span_extraction(self):
+        text = 'Here is the guide:\n{"guideMarkdown": "use {x}"}\nLet me know if you need more.'
+        with patch("app.orchestrators.headstart_orchestrator._extract_json_span") as mock_span:
+            self.assertEqual(_try_parse_json(text), {"guideMarkdown": "use {x}"})
+        mock_span.assert_not_called()
+
+    def test_raises_when_no_object_present(self):
+        with self.assertRaises(ValueError):
+            _try_parse_json("no json here")
+
+    def test_unwraps_text_dict_and_list_wrappers(self):
+        self.assertEqual(_maybe_unwrap_text_dict("{'type': 'text', 'text': 'hello'}"), "hello")
+        self.assertEqual(_maybe_unwrap_text_dict("[{'type': 'text', 'text': 'hello'}]"), "hello")
+
+    def test_strip_markdown_fences_only_touches_fully_fenced_text(self):
+        self.assertEqual(_strip_markdown_fences("```markdown\n# Guide\n```  "), "# Guide")
+        self.assertEqual(_strip_markdown_fences("  # Guide with ``` inline \n"), "# Guide with ``` inline")
+        self.assertEqual(_strip_markdown_fences("```"), "")
+
+    def test_unwrap_returns_stripped_text(self):
+        self.assertEqual(_maybe_unwrap_text_dict('  {"a": 1}\n'), '{"a": 1}')
+        self.assertEqual(_maybe_unwrap_text_dict("  {'type': 'text', 'text': ' hi '}  "), "hi")
+
+    def test_unwrap_skips_literal_eval_for_plain_json(self):
+        text = '{"guideMarkdown": "## Overview"}'
+        with patch("app.orchestrators.headstart_orchestrator.ast.literal_eval") as mock_eval:
+            self.assertEqual(_maybe_unwrap_text_dict(text), text)
+        mock_eval.assert_not_called()
+
+    def test_unwrap_parses_json_wrappers_without_literal_eval(self):
+        text = '[{"type": "text", "text": "it\'s done"}]'
+        with patch("app.orchestrators.headstart_orchestrator.ast.literal_eval") as mock_eval:
+            self.assertEqual(_maybe_unwrap_text_dict(text), "it's done")
+        mock_eval.assert_not_called()
+        self.assertEqual(_maybe_unwrap_text_dict("{'type': 'text', 'text': \"it's done\"}"), "it's done")
+
+
+if __name__ == "__main__":
+    unittest.main()
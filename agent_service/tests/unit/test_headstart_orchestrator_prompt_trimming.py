@@ -0,0 +1,54 @@
+import os
+import unittest
+from unittest.mock import patch
+
+from app.orchestrators.headstart_orchestrator import _prepare, _trim_pdf_text_for_prompt
+from app.services.pdf_text_service import format_attachment_block
+
+SPEC_TEXT = "\n".join(f"Requirement {index}: submit part {index}." for index in range(200))
+
+
+class TestHeadstartOrchestratorPromptTrimming(unittest.TestCase):
+    def test_short_text_is_unchanged(self):
+        with patch.dict(os.environ, {"HEADSTART_MAX_PDF_CHARS": "60000"}, clear=False):
+            self.assertEqual(_trim_pdf_text_for_prompt(SPEC_TEXT), SPEC_TEXT)
+
+    def test_long_text_keeps_head_and_tail_on_line_boundaries(self):
+        with patch.dict(os.environ, {"HEADSTART_MAX_PDF_CHARS": "400"}, clear=False):
+            trimmed = _trim_pdf_text_for_prompt(SPEC_TEXT)
+
+        self.assertLessEqual(len(trimmed), 400)
+        self.assertTrue(trimmed.startswith("Requirement 0: submit part 0.\n"))
+        self.assertTrue(trimmed.endswith("Requirement 199: submit part 199."))
+        self.assertIn("...[truncated ", trimmed)
+        for line in trimmed.splitlines():
+            self.assertTrue(not line or line.startswith(("Requirement ", "...[truncated ")), line)
+
+    def test_each_attachment_keeps_its_tags_and_a_share_of_the_budget(self):
+        names = ("spec.pdf", "rubric.pdf", "notes.pdf")
+        blocks = [
+            format_attachment_block(name, "assignment", "\n".join(f"{name} line {n}." for n in range(100)))
+            for name in names
+        ]
+        blocks.insert(1, format_attachment_block("short.pdf", "assignment", "Due Friday."))
+        text = "\n\n".join(blocks)
+
+        with patch.dict(os.environ, {"HEADSTART_MAX_PDF_CHARS": "1500"}, clear=False):
+            trimmed = _trim_pdf_text_for_prompt(text)
+
+        self.assertLessEqual(len(trimmed), 1500)
+        self.assertEqual(trimmed.count("<attachment "), 4)
+        self.assertEqual(trimmed.count("\n</attachment>"), 4)
+        self.assertEqual(trimmed.count("...[truncated "), 3)
+        self.assertIn('source="assignment" type="pdf">\nDue Friday.\n</attachment>', trimmed)
+        for name in names:
+            self.assertIn(f"{name} line 0.", trimmed)
+            self.assertIn(f"{name} line 99.\n</attachment>", trimmed)
+
+    def test_zero_budget_disables_trimming(self):
+        with patch.dict(os.environ, {"HEADSTART_MAX_PDF_CHARS": "0"}, clear=False):
+            self.assertEqual(_prepare({"title": "HW1"}, SPEC_TEXT).pdf_text, SPEC_TEXT)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import os
+import unittest
+from unittest.mock import patch
+
+from app.orchestrators import headstart_orchestrator
+from app.orchestrators.headstart_orchestrator import run_headstart_agent
+
+SAMPLE_RESULT = {"guideMarkdown": "## Assignment Overview\n\nStart here."}
+
+
+class TestHeadstartOrchestratorResponseCache(unittest.TestCase):
+    def setUp(self):
+        headstart_orchestrator._clear_response_cache()
+        self.addCleanup(headstart_orchestrator._clear_response_cache)
+
+    def _run(self, payload, pdf_text="", env=None):
+        environ = {"NVIDIA_API_KEY": "test-key", **(env or {})}
+        with patch.dict(os.environ, environ, clear=False), patch(
+            "app.orchestrators.headstart_orchestrator.build_nvidia_chat_client",
+            return_value=object(),
+        ), patch(
+            "app.orchestrators.headstart_orchestrator._try_structured_output",
+            side_effect=lambda *args: dict(SAMPLE_RESULT),
+        ) as mock_structured:
+            result = run_headstart_agent(payload, pdf_text)
+        return result, mock_structured.call_count
+
+    def test_identical_requests_reuse_cached_result(self):
+        first, first_calls = self._run({"title": "HW1"}, "pdf")
+        second, second_calls = self._run({"title": "HW1"}, "pdf")
+
+        self.assertEqual(first, SAMPLE_RESULT)
+        self.assertEqual(second, SAMPLE_RESULT)
+        self.assertEqual(first_calls, 1)
+        self.assertEqual(second_calls, 0)
+
+    def test_volatile_payload_fields_do_not_affect_cache_key(self):
+        self._run({"title": "HW1", "requestId": "a", "timestamp": 1})
+        _, calls = self._run({"title": "HW1", "requestId": "b", "timestamp": 2})
+
+        self.assertEqual(calls, 0)
+
+    def test_extension_bookkeeping_fields_do_not_affect_cache_key(self):
+        self._run({"title": "HW1", "userId": "u1", "status": "detected", "detectedAt": "2026-01-01T00:00:00Z"})
+        _, calls = self._run({"title": "HW1", "userId": "u1", "status": "extracted", "detectedAt": "2026-01-02T00:00:00Z"})
+
+        self.assertEqual(calls, 0)
+
+    def test_different_users_do_not_share_cached_guides(self):
+        self._run({"title": "HW1", "userId": "u1"})
+        _, calls = self._run({"title": "HW1", "userId": "u2"})
+
+        self.assertEqual(calls, 1)
+
+    def test_different_pdf_text_misses_cache(self):
+        self._run({"title": "HW1"}, "pdf-a")
+        _, calls = self._run({"title": "HW1"}, "pdf-b")
+
+        self.assertEqual(calls, 1)
+
+    def test_cached_result_is_isolated_from_caller_mutation(self):
+        first, _ = self._run({"title": "HW1"})
+        first["guideMarkdown"] = "mutated"
+        second, _ = self._run({"title": "HW1"})
+
+        self.assertEqual(second, SAMPLE_RESULT)
+
+    def test_hit_and_miss_counters_track_lookups(self):
+        self._run({"title": "HW1"})
+        self._run({"title": "HW1"})
+        self._run({"title": "HW2"})
+
+        self.assertEqual(
+            headstart_orchestrator._response_cache_stats(),
+            {"hits": 1, "misses": 2, "entries": 2},
+        )
+
+    def test_zero_ttl_disables_cache(self):
+        self._run({"title": "HW1"}, env={"HEADSTART_CACHE_TTL": "0"})
+        _, calls = self._run({"title": "HW1"}, env={"HEADSTART_CACHE_TTL": "0"})
+
+        self.assertEqual(calls, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,203 @@
+import asyncio
+import os
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from app.orchestrators import headstart_orchestrator
+from app.orchestrators.headstart_orchestrator import arun_headstart_agent, run_headstart_agent
+
+PROMPT_RESULT = {"guideMarkdown": "## Assignment Overview\n\nFrom prompt."}
+
+
+class TestHeadstartOrchestratorStrategyRace(unittest.TestCase):
+    def setUp(self):
+        headstart_orchestrator._clear_response_cache()
+        self.addCleanup(headstart_orchestrator._clear_response_cache)
+
+    def _env(self, **extra):
+        return patch.dict(
+            os.environ,
+            {"NVIDIA_API_KEY": "test-key", "HEADSTART_CACHE_TTL": "0", **extra},
+            clear=False,
+        )
+
+    def test_race_returns_prompt_result_and_cancels_slow_structured(self):
+        cancelled = []
+
+        async def slow_structured(*args):
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        async def prompt_based(*args):
+            return PROMPT_RESULT
+
+        with self._env(HEADSTART_RACE_STRATEGIES="1"), patch.object(
+            headstart_orchestrator, "RACE_PROMPT_DELAY_SECONDS", 0.01
+        ), patch(
+            "app.orchestrators.headstart_orchestrator.build_nvidia_chat_client",
+            return_value=object(),
+        ), patch(
+            "app.orchestrators.headstart_orchestrator._atry_structured_output",
+            side_effect=slow_structured,
+        ), patch(
+            "app.orchestrators.headstart_orchestrator._atry_prompt_based",
+            side_effect=prompt_based,
+        ):
+            result = run_headstart_agent({"title": "HW1"})
+
+        self.assertEqual(result, PROMPT_RESULT)
+        self.assertEqual(cancelled, [True])
+
+    def test_race_does_not_wait_for_a_blocking_losing_call(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        async def blocking_structured(*args):
+            # Mimics a client whose async API falls back to run_in_executor.
+            await asyncio.get_running_loop().run_in_executor(None, release.wait, 5)
+            return None
+
+        async def prompt_based(*args):
+            return PROMPT_RESULT
+
+        with self._env(HEADSTART_RACE_STRATEGIES="1"), patch.object(
+            headstart_orchestrator, "RACE_PROMPT_DELAY_SECONDS", 0.01
+        ), patch(
+            "app.orchestrators.headstart_orchestrator.build_nvidia_chat_client",
+            return_value=object(),
+        ), patch(
+            "app.orchestrators.headstart_orchestrator._atry_structured_output",
+            side_effect=blocking_structured,
+        ), patch(
+            "app.orchestrators.headstart_orchestrator._atry_prompt_based",
+            side_effect=prompt_based,
+        ):
+            started = time.monotonic()
+            result = run_headstart_agent({"title": "HW1"})
+            elapsed = time.monotonic() - started
+
+        self.assertEqual(result, PROMPT_RESULT)
+        self.assertLess(elapsed, 2.0)
+
+    def test_race_raises_when_both_strategies_fail(self):
+        async def structured(*args):
+            return None
+
+        async def prompt_based(*args):
+            raise RuntimeError("bad json")
+
+        with self._env(HEADSTART_RACE_STRATEGIES="1"), patch(
+            "app.orchestrators.headstart_orchestrator.build_nvidia_chat_client",
+            return_value=object(),
+        ), patch(
+            "app.orchestrators.headstart_orchestrator._atry_structured_output",
+            side_effect=structured,
+        ), patch(
+            "app.orchestrators.headstart_orchestrator._atry_prompt_based",
+            side_effect=prompt_based,
+        ):
+            with self.assertRaises(RuntimeError) as raised:
+                run_headstart_agent({"title": "HW1"})
+
+        self.assertIn("bad json", str(raised.exception))
+
+    def test_async_race_skips_prompt_based_when_structured_finishes_in_time(self):
+        async def structured(*args):
+            return {"guideMarkdown": "structured"}
+
+        async def prompt_based(*args):
+            raise AssertionError("fallback should not start")
+
+        with self._env(HEADSTART_RACE_STRATEGIES="1"), patch(
+            "app.orchestrators.headstart_orchestrator.build_nvidia_chat_client",
+            return_value=object(),
+        ), patch(
+            "app.orchestrators.headstart_orchestrator._atry_structured_output",
+            side_effect=structured,
+        ), patch(
+            "app.orchestrators.headstart_orchestrator._atry_prompt_based",
+            side_effect=prompt_based,
+        ):
+            result = asyncio.run(arun_headstart_agent({"title": "HW1"}))
+
+        self.assertEqual(result, {"guideMarkdown": "structured"})
+
+    def test_async_race_cancels_slow_structured_when_prompt_based_wins(self):
+        cancelled = []
+
+        async def slow_structured(*args):
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        async def prompt_based(*args):
+            return PROMPT_RESULT
+
+        async def run_and_settle():
+            result = await arun_headstart_agent({"title": "HW1"})
+            await asyncio.sleep(0)
+            return result
+
+        with self._env(HEADSTART_RACE_STRATEGIES="1"), patch.object(
+            headstart_orchestrator, "RACE_PROMPT_DELAY_SECONDS", 0.01
+        ), patch(
+            "app.orchestrators.headstart_orchestrator.build_nvidia_chat_client",
+            return_value=object(),
+        ), patch(
+            "app.orchestrators.headstart_orchestrator._atry_structured_output",
+            side_effect=slow_structured,
+        ), patch(
+            "app.orchestrators.headstart_orchestrator._atry_prompt_based",
+            side_effect=prompt_based,
+        ):
+            result = asyncio.run(run_and_settle())
+
+        self.assertEqual(result, PROMPT_RESULT)
+        self.assertEqual(cancelled, [True])
+
+    def test_sequential_fallback_is_default(self):
+        with self._env(), patch(
+            "app.orchestrators.headstart_orchestrator.build_nvidia_chat_client",
+            return_value=object(),
+        ), patch(
+            "app.orchestrators.headstart_orchestrator._try_structured_output",
+            return_value=None,
+        ) as mock_structured, patch(
+            "app.orchestrators.headstart_orchestrator._try_prompt_based",
+            return_value=PROMPT_RESULT,
+        ) as mock_prompt:
+            result = run_headstart_agent({"title": "HW1"})
+
+        self.assertEqual(result, PROMPT_RESULT)
+        mock_structured.assert_called_once()
+        mock_prompt.assert_called_once()
+
+    def test_structured_runnable_is_built_once_per_client(self):
+        class FakeStructured:
+            def invoke(self, messages, **kwargs):
+                return None
+
+        class FakeClient:
+            bind_calls = 0
+
+            def with_structured_output(self, schema):
+                FakeClient.bind_calls += 1
+                return FakeStructured()
+
+        client = FakeClient()
+        inputs = headstart_orchestrator._prepare({"title": "HW1"}, "")
+        headstart_orchestrator._try_structured_output(client, inputs)
+        headstart_orchestrator._try_structured_output(client, inputs)
+
+        self.assertEqual(FakeClient.bind_calls, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
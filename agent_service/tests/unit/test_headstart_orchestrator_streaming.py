@@ -3,6 +3,9 @@ import unittest
 from unittest.mock import patch
 
 from app.orchestrators.headstart_orchestrator import (
+    _StreamDeltaTracker,
+    _stream_message_deltas,
+    _stream_until_json,
     stream_headstart_agent_markdown,
     stream_headstart_chat_answer,
 )
@@ -30,6 +33,19 @@ class FakeStreamingClient:
 
 
 class TestHeadstartOrchestratorStreaming(unittest.TestCase):
+    def test_stream_delta_tracker_handles_delta_and_cumulative_streams(self):
+        deltas = _StreamDeltaTracker()
+        self.assertEqual([deltas.push(part) for part in ["Hel", "lo", "", " world"]], ["Hel", "lo", "", " world"])
+        self.assertEqual(deltas.text, "Hello world")
+        self.assertEqual(len(deltas), 11)
+
+        cumulative = _StreamDeltaTracker()
+        self.assertEqual(
+            [cumulative.push(part) for part in ["Hel", "Hello", "Hello world"]],
+            ["Hel", "lo", " world"],
+        )
+        self.assertEqual(cumulative.text, "Hello world")
+
     def test_stream_headstart_agent_markdown_uses_provider_stream(self):
         fake_client = FakeStreamingClient(
             [
@@ -47,16 +63,25 @@ class TestHeadstartOrchestratorStreaming(unittest.TestCase):
         self.assertEqual(
             chunks,
             [
-                {"content_delta": "", "reasoning_delta": "thinking-1"},
                 {
                     "content_delta": "## Assignment Overview\n\nStart here.",
-                    "reasoning_delta": "thinking-2",
+                    "reasoning_delta": "thinking-1thinking-2",
                 },
             ],
         )
         self.assertEqual(len(fake_client.stream_calls), 1)
         self.assertEqual(fake_client.stream_calls[0][1], {})
 
+    def test_stream_message_deltas_coalesce_small_deltas(self):
+        parts = [f"{index:09d}," for index in range(60)]
+        fake_client = FakeStreamingClient([FakeChunk(part) for part in parts])
+
+        with patch("app.orchestrators.headstart_orchestrator.STREAM_FLUSH_MAX_DELAY_SECONDS", 60.0):
+            chunks = list(_stream_message_deltas(fake_client, []))
+
+        self.assertEqual([len(chunk["content_delta"]) for chunk in chunks], [260, 260, 80])
+        self.assertEqual("".join(chunk["content_delta"] for chunk in chunks), "".join(parts))
+
     def test_stream_headstart_chat_answer_suppresses_reasoning_when_disabled(self):
         fake_client = FakeStreamingClient(
             [
@@ -83,6 +108,46 @@ class TestHeadstartOrchestratorStreaming(unittest.TestCase):
         )
         self.assertEqual(len(fake_client.stream_calls), 1)
 
+    def test_stream_until_json_stops_after_first_complete_object(self):
+        consumed = []
+
+        def chunks():
+            for text in ['{"guideMarkdown": ', '"## Overview"', "}", " trailing tokens"]:
+                consumed.append(text)
+                yield FakeChunk(text)
+
+        fake_client = FakeStreamingClient(chunks())
+
+        result = _stream_until_json(fake_client, [])
+
+        self.assertEqual(result, {"guideMarkdown": "## Overview"})
+        self.assertEqual(consumed, ['{"guideMarkdown": ', '"## Overview"', "}"])
+
+    def test_stream_until_json_keeps_reading_past_braces_inside_strings(self):
+        fake_client = FakeStreamingClient(
+            [
+                FakeChunk('{"guideMarkdown": "use {x}'),
+                FakeChunk(' and }"'),
+                FakeChunk("}"),
+            ]
+        )
+
+        result = _stream_until_json(fake_client, [])
+
+        self.assertEqual(result, {"guideMarkdown": "use {x} and }"})
+
+    def test_stream_until_json_recovers_truncated_object_at_end_of_stream(self):
+        fake_client = FakeStreamingClient(
+            [
+                FakeChunk('{"guideMarkdown": "## Overview\n'),
+                FakeChunk("- first step"),
+            ]
+        )
+
+        result = _stream_until_json(fake_client, [])
+
+        self.assertEqual(result, {"guideMarkdown": "## Overview\n- first step"})
+
 
 if __name__ == "__main__":
     unittest.main()
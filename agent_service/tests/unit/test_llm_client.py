@@ -6,6 +6,10 @@ from app.clients import llm_client
 
 
 class TestLlmClient(unittest.TestCase):
+    def setUp(self):
+        llm_client.build_nvidia_chat_client.cache_clear()
+        self.addCleanup(llm_client.build_nvidia_chat_client.cache_clear)
+
     def test_registers_strict_model_when_missing(self):
         with patch.dict(os.environ, {"NVIDIA_API_KEY": "test-key"}, clear=False), patch.dict(
             llm_client.MODEL_TABLE,
@@ -71,6 +75,35 @@ class TestLlmClient(unittest.TestCase):
         self.assertEqual(kwargs["top_p"], 0.95)
         self.assertNotIn("model_kwargs", kwargs)
 
+    def test_reuses_client_for_identical_settings(self):
+        with patch.dict(os.environ, {"NVIDIA_API_KEY": "test-key"}, clear=False), patch.dict(
+            llm_client.MODEL_TABLE,
+            {llm_client.STRICT_GUIDE_MODEL_ID: object()},
+            clear=True,
+        ), patch("app.clients.llm_client.ChatNVIDIA", side_effect=lambda **_: object()) as mock_chat:
+            first = llm_client.build_nvidia_chat_client(
+                model_name=llm_client.STRICT_GUIDE_MODEL_ID,
+                temperature=0.2,
+                max_tokens=512,
+                top_p=0.9,
+            )
+            second = llm_client.build_nvidia_chat_client(
+                model_name=llm_client.STRICT_GUIDE_MODEL_ID,
+                temperature=0.2,
+                max_tokens=512,
+                top_p=0.9,
+            )
+            third = llm_client.build_nvidia_chat_client(
+                model_name=llm_client.STRICT_GUIDE_MODEL_ID,
+                temperature=0.7,
+                max_tokens=512,
+                top_p=0.9,
+            )
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, third)
+        self.assertEqual(mock_chat.call_count, 2)
+
     def test_wraps_duplicate_candidate_error_as_strict_runtime_error(self):
         duplicate_error = (
             "Multiple candidates for openai/gpt-oss-120b "
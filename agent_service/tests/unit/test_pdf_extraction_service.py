@@ -1,9 +1,11 @@
 import unittest
 from unittest.mock import patch
 
+from app.core.logging import request_id_var
 from app.schemas.requests import RunAgentRequest
 from app.schemas.shared import PdfExtraction, PdfFile, PdfVisualSignal
 from app.services.pdf_extraction_service import (
+    _to_visual_signal_models,
     collect_visual_signals_from_extractions,
     extract_pdf_extraction_from_pdf_bytes,
     extract_pdf_extractions_with_file_map,
@@ -58,6 +60,18 @@ class TestPdfExtractionService(unittest.TestCase):
         self.assertEqual(len(merged), 1)
         self.assertEqual(sorted(merged[0]["signal_types"]), ["highlight", "underline"])
 
+    def test_to_visual_signal_models_drops_only_malformed_signals(self):
+        signals = [
+            {"file": "spec.pdf", "page": 1, "text": "Q1", "score": 1.1, "significance": "high"},
+            {"file": "spec.pdf", "page": "not-a-page", "text": "bad"},
+            {"file": "spec.pdf", "page": 2, "text": "Q2"},
+        ]
+
+        models = _to_visual_signal_models(signals)
+
+        self.assertEqual([model.text for model in models], ["Q1", "Q2"])
+        self.assertTrue(all(isinstance(model, PdfVisualSignal) for model in models))
+
     def test_extract_pdf_extraction_from_pdf_bytes_uses_native_structured_output(self):
         with patch(
             "app.services.pdf_extraction_service.extract_pdf_context_from_pdf_bytes",
@@ -109,6 +123,62 @@ class TestPdfExtractionService(unittest.TestCase):
         self.assertIn("sha-1", by_sha)
         self.assertEqual(by_sha["sha-1"].full_text, "cached")
 
+    def test_extract_pdf_extractions_with_file_map_extracts_files_concurrently_in_order(self):
+        req = RunAgentRequest(
+            payload={"title": "HW1"},
+            pdf_files=[
+                PdfFile(filename="a.pdf", file_sha256="sha-a", base64_data="YQ=="),
+                PdfFile(filename="b.pdf", file_sha256="sha-b", base64_data="Yg=="),
+                PdfFile(filename="a-copy.pdf", file_sha256="sha-a", base64_data="YQ=="),
+                PdfFile(filename="c.pdf", base64_data="Yw=="),
+            ],
+        )
+
+        def fake_extract(pdf_bytes, filename, source, file_sha256):
+            return PdfExtraction(
+                filename=filename,
+                source=source,
+                file_sha256=file_sha256,
+                full_text=pdf_bytes.decode("utf-8"),
+                pages=[],
+                visual_signals=[],
+            )
+
+        with patch(
+            "app.services.pdf_extraction_service.extract_pdf_extraction_from_pdf_bytes",
+            side_effect=fake_extract,
+        ) as mock_extract:
+            extractions, by_sha = extract_pdf_extractions_with_file_map(req)
+
+        self.assertEqual([item.filename for item in extractions], ["a.pdf", "b.pdf", "c.pdf"])
+        self.assertEqual([item.full_text for item in extractions], ["a", "b", "c"])
+        self.assertEqual(sorted(by_sha), ["sha-a", "sha-b"])
+        self.assertEqual(mock_extract.call_count, 3)
+
+    def test_concurrent_file_extraction_keeps_the_callers_request_id(self):
+        req = RunAgentRequest(
+            payload={"title": "HW1"},
+            pdf_files=[
+                PdfFile(filename="a.pdf", base64_data="YQ=="),
+                PdfFile(filename="b.pdf", base64_data="Yg=="),
+            ],
+        )
+        seen = []
+
+        def fake_extract_file(pdf_file, source):
+            seen.append(request_id_var.get())
+            return None
+
+        token = request_id_var.set("req-7")
+        self.addCleanup(request_id_var.reset, token)
+        with patch(
+            "app.services.pdf_extraction_service._extract_pdf_file",
+            side_effect=fake_extract_file,
+        ):
+            extract_pdf_extractions_with_file_map(req)
+
+        self.assertEqual(seen, ["req-7", "req-7"])
+
 
 if __name__ == "__main__":
     unittest.main()
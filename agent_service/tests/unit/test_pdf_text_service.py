@@ -0,0 +1,345 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from app.core.logging import request_id_var
+from app.services import pdf_text_service
+
+
+def _fake_scan_range(source, filename, start, stop, collect_visual, request_id="-"):
+    pages = [(index + 1, f"page {index + 1}", False, b"") for index in range(start, stop)]
+    signals = [{"file": filename, "page": start + 1}] if collect_visual else []
+    return pages, signals
+
+
+class TestPdfTextServiceDecode(unittest.TestCase):
+    def test_decode_pdf_base64_accepts_raw_and_data_url_payloads(self):
+        self.assertEqual(pdf_text_service._decode_pdf_base64("  JVBERi0=\n"), b"%PDF-")
+        self.assertEqual(
+            pdf_text_service._decode_pdf_base64(" data:application/pdf;base64,JVBERi0="),
+            b"%PDF-",
+        )
+
+    def test_decode_pdf_base64_accepts_line_wrapped_payloads(self):
+        self.assertEqual(pdf_text_service._decode_pdf_base64("JVBE\nRi0x\r\nLjQ=\n"), b"%PDF-1.4")
+
+
+class TestPdfTextServiceTextQuality(unittest.TestCase):
+    def test_compute_text_quality_counts_non_space_characters(self):
+        metrics = pdf_text_service._compute_text_quality("Due: Friday\n  (5 pts) ~~")
+
+        self.assertEqual(metrics["chars"], 18)
+        self.assertEqual(metrics["words"], 3)
+        self.assertAlmostEqual(metrics["alnum_ratio"], 13 / 18)
+        self.assertAlmostEqual(metrics["symbol_ratio"], 5 / 18)
+
+    def test_compute_text_quality_ascii_and_unicode_paths_agree(self):
+        ascii_text = "Part 2:\tWrite\x0bthe\x1cproof  [10%]\n"
+        metrics = pdf_text_service._compute_text_quality(ascii_text)
+        unicode_metrics = pdf_text_service._compute_text_quality(ascii_text + "\u00e9")
+
+        self.assertEqual(unicode_metrics["chars"], metrics["chars"] + 1)
+        self.assertEqual(
+            round(unicode_metrics["alnum_ratio"] * unicode_metrics["chars"]),
+            round(metrics["alnum_ratio"] * metrics["chars"]) + 1,
+        )
+
+    def test_score_text_quality_short_circuits_on_empty_text(self):
+        with patch.object(pdf_text_service, "_compute_text_quality") as mock_metrics:
+            self.assertEqual(pdf_text_service._score_text_quality(""), 0.0)
+
+        mock_metrics.assert_not_called()
+
+    def test_should_ocr_page_short_circuits_on_short_text(self):
+        with patch.object(pdf_text_service, "_count_text_chars") as mock_count:
+            self.assertTrue(pdf_text_service._should_ocr_page("Page 3"))
+
+        mock_count.assert_not_called()
+
+    def test_compute_text_quality_handles_empty_text(self):
+        metrics = pdf_text_service._compute_text_quality("")
+
+        self.assertEqual(metrics["chars"], 0)
+        self.assertEqual(metrics["alnum_ratio"], 0.0)
+        self.assertEqual(metrics["symbol_ratio"], 1.0)
+
+
+class TestPdfTextServiceVisualSignalScore(unittest.TestCase):
+    def test_question_markers_outscore_mentions(self):
+        score = pdf_text_service._score_visual_signal
+
+        self.assertEqual(score("Question 3)", ["highlight"]), 1.5)
+        self.assertEqual(score("Answer question 4 first", ["highlight"]), 1.25)
+        self.assertEqual(score("Read carefully", ["bold", "underline"]), 1.45)
+
+
+class TestPdfTextServiceWordMapping(unittest.TestCase):
+    def test_collect_text_in_rect_normalizes_selected_words_once(self):
+        class Rect:
+            def __init__(self, x0, y0, x1, y1):
+                self.x0, self.y0, self.x1, self.y1 = x0, y0, x1, y1
+
+            def __and__(self, other):
+                return Rect(max(self.x0, other.x0), max(self.y0, other.y0), min(self.x1, other.x1), min(self.y1, other.y1))
+
+            @property
+            def is_empty(self):
+                return self.x1 <= self.x0 or self.y1 <= self.y0
+
+            def get_area(self):
+                return (self.x1 - self.x0) * (self.y1 - self.y0)
+
+        page = SimpleNamespace(
+            rect=Rect(0, 0, 612, 792),
+            get_text=lambda mode: [
+                (50, 100, 90, 110, "Question\u00a0", 0, 0, 0),
+                (95, 100, 105, 110, "2", 0, 0, 1),
+                (50, 300, 90, 310, "elsewhere", 0, 0, 2),
+                (50, 100, 60, 110, " ", 0, 0, 3),
+            ],
+        )
+
+        words = pdf_text_service._extract_words_for_page(page)
+        word_bands = pdf_text_service._index_words_by_band(words)
+        annot_rect = Rect(45, 98, 110, 112)
+
+        self.assertEqual([word["text"] for word in words], ["Question", "2", "elsewhere"])
+        self.assertEqual(pdf_text_service._collect_text_in_rect(page, annot_rect, words=words), "Question 2")
+        with patch.object(
+            pdf_text_service, "_overlap_ratio", wraps=pdf_text_service._overlap_ratio
+        ) as mock_overlap:
+            text = pdf_text_service._collect_text_in_rect(page, annot_rect, words=words, word_bands=word_bands)
+
+        self.assertEqual(text, "Question 2")
+        self.assertEqual(mock_overlap.call_count, 2)
+
+
+class TestPdfTextServiceNormalization(unittest.TestCase):
+    def test_normalize_page_text_unifies_line_endings_and_nbsp(self):
+        text = "Part\u00a01:\r\nwrite the\rparser\n\nSubmit multi-\nline code"
+
+        self.assertEqual(
+            pdf_text_service._normalize_page_text(text),
+            "Part 1:\nwrite the parser\n\nSubmit multiline code",
+        )
+
+    def test_structural_line_detection(self):
+        structural = (
+            "- item",
+            "\u2022\tpoint",
+            "12. step",
+            "3) case",
+            "Deliverables:",
+            "a | b",
+            "Name    Score",
+            "Name\t\tScore",
+            "Name\u00a0\u00a0Score",
+            "OVERVIEW",
+        )
+        for line in structural:
+            self.assertTrue(pdf_text_service._looks_like_structural_line(line), line)
+        for line in ("-item", "12.5 points total", "1.", "2024 was a year", "Plain prose line", "Caf\u00e9 au lait", ""):
+            self.assertFalse(pdf_text_service._looks_like_structural_line(line), line)
+
+    def test_remove_repeated_headers_and_footers_drops_boilerplate(self):
+        topics = ["Parse the input.", "Build the index.", "Rank the results.", "Write the report."]
+        pages = [f"CS 101 Homework\n{topic}\nPage {n} of 4" for n, topic in enumerate(topics, start=1)]
+
+        with patch.object(
+            pdf_text_service, "_normalize_match_line", wraps=pdf_text_service._normalize_match_line
+        ) as mock_normalize:
+            cleaned = pdf_text_service._remove_repeated_headers_and_footers(pages)
+
+        self.assertEqual(cleaned, topics)
+        # One header, four topics, four page counters: each distinct line is normalized once.
+        self.assertEqual(mock_normalize.call_count, 9)
+
+
+class TestPdfTextServiceDebugDump(unittest.TestCase):
+    def test_dump_is_written_off_the_calling_thread(self):
+        with tempfile.TemporaryDirectory() as dump_dir:
+            env = {"ENABLE_PDF_DEBUG_DUMP": "true", "PDF_DEBUG_DUMP_DIR": dump_dir}
+            with patch.dict(os.environ, env, clear=False):
+                pdf_text_service._maybe_dump_pdf_text(["first", "second"])
+            # The writer is single-threaded, so a no-op task completes after the dump.
+            pdf_text_service._get_pdf_dump_executor().submit(lambda: None).result()
+
+            [dump_name] = os.listdir(dump_dir)
+            with open(os.path.join(dump_dir, dump_name), encoding="utf-8") as f:
+                self.assertEqual(f.read(), "first\n\n\nsecond")
+
+    def test_dump_is_skipped_when_disabled(self):
+        with patch.dict(os.environ, {"ENABLE_PDF_DEBUG_DUMP": "false"}, clear=False), patch.object(
+            pdf_text_service, "_get_pdf_dump_executor"
+        ) as mock_executor:
+            pdf_text_service._maybe_dump_pdf_text(["text"])
+
+        mock_executor.assert_not_called()
+
+
+class TestPdfTextServiceRenderDpi(unittest.TestCase):
+    @staticmethod
+    def _page(*images):
+        return SimpleNamespace(
+            rect=SimpleNamespace(width=612.0, height=792.0),
+            get_image_info=lambda: list(images),
+        )
+
+    def test_full_page_scan_renders_at_source_resolution(self):
+        scan_150 = {"bbox": (0.0, 0.0, 612.0, 792.0), "width": 1275, "height": 1650}
+        scan_200 = {"bbox": (0.0, 0.0, 612.0, 792.0), "width": 1700, "height": 2200}
+        self.assertEqual(pdf_text_service._vlm_render_dpi(self._page(scan_150)), 150)
+        self.assertEqual(pdf_text_service._vlm_render_dpi(self._page(scan_200)), 200)
+
+    def test_dpi_is_clamped_and_small_images_are_ignored(self):
+        scan_600 = {"bbox": (0.0, 0.0, 612.0, 792.0), "width": 5100, "height": 6600}
+        scan_72 = {"bbox": (0.0, 0.0, 612.0, 792.0), "width": 612, "height": 792}
+        logo = {"bbox": (36.0, 36.0, 136.0, 86.0), "width": 100, "height": 50}
+
+        self.assertEqual(pdf_text_service._vlm_render_dpi(self._page(scan_600)), pdf_text_service.VLM_RENDER_DPI)
+        self.assertEqual(pdf_text_service._vlm_render_dpi(self._page(scan_72)), pdf_text_service.VLM_MIN_RENDER_DPI)
+        self.assertEqual(pdf_text_service._vlm_render_dpi(self._page(logo)), pdf_text_service.VLM_RENDER_DPI)
+        self.assertEqual(pdf_text_service._vlm_render_dpi(self._page()), pdf_text_service.VLM_RENDER_DPI)
+
+
+class TestPdfTextServiceContextCache(unittest.TestCase):
+    def setUp(self):
+        pdf_text_service._clear_pdf_context_cache()
+        self.addCleanup(pdf_text_service._clear_pdf_context_cache)
+
+    def _extract(self, pdf_bytes, filename, pages):
+        with patch.object(
+            pdf_text_service,
+            "_extract_pages_and_visual_signals",
+            return_value=(pages, [{"file": filename, "page": 1}]),
+        ) as mock_extract:
+            result = pdf_text_service.extract_pdf_context_from_pdf_bytes(pdf_bytes, filename)
+        return result, mock_extract.call_count
+
+    def test_repeated_content_reuses_extraction(self):
+        pages = [pdf_text_service.ExtractedPage(number=1, method="native", text="Submit by Friday.")]
+        (first_text, first_signals), first_calls = self._extract(b"%PDF-1", "hw1.pdf", pages)
+        first_signals[0]["page"] = 99
+        (second_text, second_signals), second_calls = self._extract(b"%PDF-1", "hw1.pdf", pages)
+        (_, _), other_name_calls = self._extract(b"%PDF-1", "copy.pdf", pages)
+
+        self.assertEqual((first_calls, second_calls, other_name_calls), (1, 0, 1))
+        self.assertEqual(second_text, first_text)
+        self.assertEqual(second_signals, [{"file": "hw1.pdf", "page": 1}])
+
+    def test_pages_without_text_are_not_cached(self):
+        pages = [pdf_text_service.ExtractedPage(number=1, method="none", text="")]
+        _, first_calls = self._extract(b"%PDF-2", "scan.pdf", pages)
+        _, second_calls = self._extract(b"%PDF-2", "scan.pdf", pages)
+
+        self.assertEqual((first_calls, second_calls), (1, 1))
+
+
+class TestPdfTextServiceParallelScan(unittest.TestCase):
+    def test_scan_pages_in_parallel_splits_ranges_and_preserves_order(self):
+        executor = ThreadPoolExecutor(max_workers=3)
+        self.addCleanup(executor.shutdown)
+
+        doc = object()
+
+        with patch.object(
+            pdf_text_service, "_get_page_scan_executor", return_value=executor
+        ), patch.object(
+            pdf_text_service, "_scan_page_range_from_bytes", side_effect=_fake_scan_range
+        ) as mock_worker_scan, patch.object(
+            pdf_text_service, "_scan_page_range", side_effect=_fake_scan_range
+        ) as mock_local_scan:
+            page_data, signals = pdf_text_service._scan_pages_in_parallel(
+                doc, b"%PDF", "spec.pdf", page_count=7, range_count=3, collect_visual=True
+            )
+
+        self.assertEqual([entry[0] for entry in page_data], [1, 2, 3, 4, 5, 6, 7])
+        mock_local_scan.assert_called_once_with(doc, "spec.pdf", 0, 3, True)
+        self.assertEqual(
+            sorted(call.args[2:4] for call in mock_worker_scan.call_args_list),
+            [(3, 6), (6, 7)],
+        )
+        self.assertEqual([signal["page"] for signal in signals], [1, 4, 7])
+
+    def test_range_count_keeps_short_documents_in_process(self):
+        with patch.object(pdf_text_service, "PDF_PAGE_WORKERS", 4), patch.object(
+            pdf_text_service, "PDF_MIN_PAGES_PER_WORKER", 16
+        ):
+            counts = [pdf_text_service._page_scan_range_count(pages) for pages in (5, 31, 40, 200)]
+
+        self.assertEqual(counts, [1, 1, 2, 4])
+
+    def test_workers_receive_the_callers_request_id(self):
+        executor = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(executor.shutdown)
+        token = request_id_var.set("req-42")
+        self.addCleanup(request_id_var.reset, token)
+
+        with patch.object(
+            pdf_text_service, "_get_page_scan_executor", return_value=executor
+        ), patch.object(
+            pdf_text_service, "_scan_page_range_from_bytes", side_effect=_fake_scan_range
+        ) as mock_worker_scan, patch.object(
+            pdf_text_service, "_scan_page_range", side_effect=_fake_scan_range
+        ):
+            pdf_text_service._scan_pages_in_parallel(
+                object(), b"%PDF", "spec.pdf", page_count=4, range_count=2, collect_visual=False
+            )
+
+        self.assertEqual(mock_worker_scan.call_args.args[-1], "req-42")
+
+    def test_scans_of_two_files_overlap(self):
+        class FakeDoc:
+            page_count = 4
+
+            def close(self):
+                pass
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc_info):
+                self.close()
+
+        fake_fitz = SimpleNamespace(open=lambda stream, filetype: FakeDoc())
+        # Each file's worker range waits for the other's: only overlapping scans get past it.
+        both_scanning = threading.Barrier(2, timeout=5)
+
+        def worker_scan(*args):
+            both_scanning.wait()
+            return _fake_scan_range(*args)
+
+        executor = ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(executor.shutdown)
+        results = {}
+
+        def extract(name):
+            results[name] = pdf_text_service._extract_pages(b"%PDF", name)
+
+        with patch.dict(sys.modules, {"fitz": fake_fitz}), patch.object(
+            pdf_text_service, "PDF_PAGE_WORKERS", 2
+        ), patch.object(pdf_text_service, "PDF_MIN_PAGES_PER_WORKER", 2), patch.object(
+            pdf_text_service, "_get_page_scan_executor", return_value=executor
+        ), patch.object(
+            pdf_text_service, "_scan_page_range_from_bytes", side_effect=worker_scan
+        ), patch.object(
+            pdf_text_service, "_scan_page_range", side_effect=_fake_scan_range
+        ), patch.object(pdf_text_service, "_visual_signals_enabled", return_value=False):
+            threads = [threading.Thread(target=extract, args=(name,)) for name in ("a.pdf", "b.pdf")]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(timeout=10)
+
+        self.assertFalse(both_scanning.broken)
+        for name in ("a.pdf", "b.pdf"):
+            self.assertEqual([page.number for page in results[name]], [1, 2, 3, 4])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import asyncio
+import unittest
+
+from app.core.logging import request_id_var
+from app.core.middleware import RequestLoggingMiddleware
+
+
+async def _ok_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 201, "headers": [(b"content-type", b"text/plain")]})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def _run(app, scope):
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return sent
+
+
+class TestRequestLoggingMiddleware(unittest.TestCase):
+    def test_adds_request_id_header_and_logs_status(self):
+        app = RequestLoggingMiddleware(_ok_app)
+        with self.assertLogs("headstart.main", level="INFO") as logs:
+            sent = _run(app, {"type": "http", "method": "POST", "path": "/api/v1/runs"})
+
+        headers = dict(sent[0]["headers"])
+        self.assertEqual(headers[b"content-type"], b"text/plain")
+        self.assertEqual(len(headers[b"x-request-id"]), 32)
+        self.assertEqual(sent[1]["body"], b"ok")
+        self.assertIn("POST /api/v1/runs -> 201", logs.output[0])
+
+    def test_binds_request_id_for_the_duration_of_the_request(self):
+        seen = []
+
+        async def app(scope, receive, send):
+            seen.append(request_id_var.get())
+            await _ok_app(scope, receive, send)
+
+        with self.assertLogs("headstart.main", level="INFO"):
+            sent = _run(RequestLoggingMiddleware(app), {"type": "http", "method": "GET", "path": "/health"})
+
+        self.assertEqual(seen, [dict(sent[0]["headers"])[b"x-request-id"].decode()])
+        self.assertEqual(request_id_var.get(), "-")
+
+    def test_non_http_scopes_pass_through(self):
+        seen = []
+
+        async def lifespan_app(scope, receive, send):
+            seen.append(scope["type"])
+
+        _run(RequestLoggingMiddleware(lifespan_app), {"type": "lifespan"})
+        self.assertEqual(seen, ["lifespan"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,12 @@
+import asyncio
 import unittest
-from unittest.mock import patch
+from unittest.mock import AsyncMock, patch
 from uuid import UUID
 
 from app.schemas.rag import RetrievedChunk
-from app.schemas.requests import ChatStreamRequest, RunAgentRequest
+from app.schemas.requests import ChatStreamRequest, RunAgentBatchRequest, RunAgentRequest
 from app.services.run_agent_service import (
+    run_agent_batch_workflow,
     run_agent_workflow,
     stream_chat_workflow,
     stream_run_agent_workflow,
@@ -59,6 +61,74 @@ class TestRunAgentService(unittest.TestCase):
         mock_extract.assert_called_once_with(req)
         mock_agent.assert_called_once_with(req.payload, "pdf context", visual_signals=visual_signals)
 
+    def test_run_agent_batch_workflow_reports_per_run_errors(self):
+        req = RunAgentBatchRequest(runs=[self._build_request(), self._build_request()])
+
+        with patch(
+            "app.services.run_agent_service.extract_pdf_extractions_with_file_map",
+            return_value=([], {}),
+        ), patch(
+            "app.services.run_agent_service.format_pdf_extractions_for_prompt",
+            return_value="pdf context",
+        ), patch(
+            "app.services.run_agent_service.collect_visual_signals_from_extractions",
+            return_value=[],
+        ), patch(
+            "app.services.run_agent_service._run_headstart_agents",
+            new_callable=AsyncMock,
+            return_value=[SAMPLE_RESULT, RuntimeError("provider down")],
+        ) as mock_agents:
+            result = asyncio.run(run_agent_batch_workflow(req, route_path="/api/v1/runs/batch"))
+
+        self.assertEqual(
+            result.model_dump(),
+            {
+                "results": [
+                    {"guideMarkdown": SAMPLE_RESULT["guideMarkdown"], "error": None},
+                    {"guideMarkdown": None, "error": "provider down"},
+                ]
+            },
+        )
+        items = mock_agents.await_args.args[0]
+        self.assertEqual(len(items), 2)
+        self.assertEqual(items[0], (req.runs[0].payload, "pdf context", []))
+
+    def test_run_agent_batch_workflow_reports_per_run_extraction_errors(self):
+        broken = RunAgentRequest(assignment_uuid="def-456", payload={"title": "HW2"}, pdf_files=[])
+        req = RunAgentBatchRequest(runs=[self._build_request(), broken])
+
+        def extract(run):
+            if run is broken:
+                raise RuntimeError("storage down")
+            return [], {}
+
+        with patch(
+            "app.services.run_agent_service.extract_pdf_extractions_with_file_map",
+            side_effect=extract,
+        ), patch(
+            "app.services.run_agent_service.format_pdf_extractions_for_prompt",
+            return_value="pdf context",
+        ), patch(
+            "app.services.run_agent_service.collect_visual_signals_from_extractions",
+            return_value=[],
+        ), patch(
+            "app.services.run_agent_service._run_headstart_agents",
+            new_callable=AsyncMock,
+            return_value=[SAMPLE_RESULT],
+        ) as mock_agents:
+            result = asyncio.run(run_agent_batch_workflow(req, route_path="/api/v1/runs/batch"))
+
+        self.assertEqual(
+            result.model_dump(),
+            {
+                "results": [
+                    {"guideMarkdown": SAMPLE_RESULT["guideMarkdown"], "error": None},
+                    {"guideMarkdown": None, "error": "storage down"},
+                ]
+            },
+        )
+        self.assertEqual(mock_agents.await_args.args[0], [(req.runs[0].payload, "pdf context", [])])
+
     def test_run_agent_workflow_handles_empty_pdf_text(self):
         req = self._build_request()
 
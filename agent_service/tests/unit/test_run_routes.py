@@ -1,9 +1,10 @@
+import asyncio
 import unittest
 from unittest.mock import patch
 
 from fastapi import HTTPException
 
-from app.api.v1.routes.runs import create_run, handle_run_agent_request
+from app.api.v1.routes.runs import _format_sse, create_run, handle_run_agent_request
 from app.main import run_agent_legacy
 from app.schemas.requests import RunAgentRequest
 
@@ -28,7 +29,7 @@ class TestRunRoutes(unittest.TestCase):
             "app.api.v1.routes.runs.run_agent_workflow",
             return_value=SAMPLE_RESULT,
         ) as mock_workflow:
-            result = handle_run_agent_request(req, route_path="/api/v1/runs")
+            result = asyncio.run(handle_run_agent_request(req, route_path="/api/v1/runs"))
 
         self.assertEqual(result, SAMPLE_RESULT)
         mock_workflow.assert_called_once_with(req, route_path="/api/v1/runs")
@@ -41,7 +42,7 @@ class TestRunRoutes(unittest.TestCase):
             side_effect=RuntimeError("boom"),
         ):
             with self.assertRaises(HTTPException) as exc:
-                handle_run_agent_request(req, route_path="/api/v1/runs")
+                asyncio.run(handle_run_agent_request(req, route_path="/api/v1/runs"))
 
         self.assertEqual(exc.exception.status_code, 500)
         self.assertEqual(exc.exception.detail, "boom")
@@ -53,7 +54,7 @@ class TestRunRoutes(unittest.TestCase):
             "app.api.v1.routes.runs.handle_run_agent_request",
             return_value=SAMPLE_RESULT,
         ) as mock_handler:
-            result = create_run(req)
+            result = asyncio.run(create_run(req))
 
         self.assertEqual(result, SAMPLE_RESULT)
         mock_handler.assert_called_once_with(req, route_path="/api/v1/runs")
@@ -65,11 +66,19 @@ class TestRunRoutes(unittest.TestCase):
             "app.main.handle_run_agent_request",
             return_value=SAMPLE_RESULT,
         ) as mock_handler:
-            result = run_agent_legacy(req)
+            result = asyncio.run(run_agent_legacy(req))
 
         self.assertEqual(result, SAMPLE_RESULT)
         mock_handler.assert_called_once_with(req, route_path="/run-agent")
 
+    def test_format_sse_returns_utf8_event_frame(self):
+        frame = _format_sse("run.delta", {"delta": "line one\nline two ✓"}, event_id=3)
+
+        self.assertEqual(
+            frame,
+            'id: 3\nevent: run.delta\ndata: {"delta":"line one\\nline two ✓"}\n\n'.encode("utf-8"),
+        )
+
 
 if __name__ == "__main__":
     unittest.main()